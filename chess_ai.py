@@ -1,47 +1,265 @@
+import atexit
 import chess
 import chess.engine
+import chess.polyglot
+import math
 import os
+import pickle
 import platform
+import random
+import shutil
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Tuple, Optional, List
-import subprocess
+import threading
 import time
+import weakref
+
+# Lookup tables between our (row, col) board coordinates and python-chess squares.
+# Rows are flipped because chess.py uses 0 for the bottom row.
+_SQ_FROM_RC = tuple(tuple(chess.square(c, 7 - r) for c in range(8)) for r in range(8))
+_RC_FROM_SQ = tuple((7 - chess.square_rank(s), chess.square_file(s)) for s in range(64))
+
+# Random source for fallback and book moves; set CHESSMANCER_SEED for reproducible games
+_RNG = random.Random(os.environ.get("CHESSMANCER_SEED"))
+
+_ZOBRIST = chess.polyglot.POLYGLOT_RANDOM_ARRAY
+_ZOBRIST_HASHER = chess.polyglot.ZobristHasher(_ZOBRIST)
+
+
+class ZobristBoard(chess.Board):
+    """
+    A chess.Board that keeps its polyglot Zobrist key up to date on push/pop.
+    
+    Only the squares touched by a move are rehashed instead of all 64, so
+    zobrist_key() is O(1) per ply. The key matches chess.polyglot.zobrist_hash.
+    Other modifications (set_fen, set_piece_at, ...) clear the move stack and
+    the key is then recomputed on the next call to zobrist_key().
+    """
+    
+    def __init__(self, *args, **kwargs):
+        self._zobrist: Optional[int] = None
+        self._zobrist_stack: List[Optional[int]] = []
+        super().__init__(*args, **kwargs)
+    
+    def zobrist_key(self) -> int:
+        """Return the polyglot Zobrist key of the current position."""
+        if self._zobrist is None:
+            self._zobrist = chess.polyglot.zobrist_hash(self)
+        return self._zobrist
+    
+    def _state_hash(self, squares) -> int:
+        """Hash the given squares plus castling rights, en passant file and turn."""
+        key = (_ZOBRIST_HASHER.hash_castling(self) ^ _ZOBRIST_HASHER.hash_ep_square(self)
+               ^ _ZOBRIST_HASHER.hash_turn(self))
+        for square in squares:
+            piece = self.piece_at(square)
+            if piece:
+                key ^= _ZOBRIST[64 * ((piece.piece_type - 1) * 2 + piece.color) + square]
+        return key
+    
+    def push(self, move: chess.Move) -> None:
+        key = self._zobrist
+        self._zobrist_stack.append(key)
+        if key is None:
+            super().push(move)
+            return
+        
+        # Squares whose contents can change with this move
+        squares = {move.from_square, move.to_square}
+        if self.is_en_passant(move):
+            squares.add(chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square)))
+        elif self.is_castling(move):
+            back_rank = chess.square_rank(move.from_square) * 8
+            squares.update(range(back_rank, back_rank + 8))
+        
+        key ^= self._state_hash(squares)
+        super().push(move)
+        self._zobrist = key ^ self._state_hash(squares)
+    
+    def pop(self) -> chess.Move:
+        move = super().pop()
+        self._zobrist = self._zobrist_stack.pop()
+        return move
+    
+    def clear_stack(self) -> None:
+        super().clear_stack()
+        self._zobrist = None
+        self._zobrist_stack.clear()
+    
+    def copy(self, *, stack=True) -> "ZobristBoard":
+        board = super().copy(stack=stack)
+        board._zobrist = self._zobrist
+        board._zobrist_stack = self._zobrist_stack[len(self._zobrist_stack) - len(board.move_stack):]
+        return board
+
 
 class ChessAI:
     """A chess AI that uses the Stockfish chess engine to make moves."""
     
-    def __init__(self, difficulty: int = 10, time_limit: float = 0.1):
+    __slots__ = (
+        'difficulty', 'time_limit', 'ponder', 'multipv', 'engine', 'board', 'stockfish_path',
+        '_applied_moves', '_game', '_executor', '_search', '_search_key',
+        'tt_file', '_tt', '_book', '_engine_lock', '_closed', '_atexit_hook',
+        '_download_thread', '__weakref__'
+    )
+    
+    # Maximum number of positions kept in the transposition table
+    TT_MAX_ENTRIES = 1 << 20
+    
+    # Upper bound on engine search threads, to avoid oversubscribing the game's own threads
+    MAX_ENGINE_THREADS = 4
+    
+    # Bounds for the engine hash table size in MB
+    MIN_HASH_MB = 128
+    MAX_HASH_MB = 1024
+    
+    # Default file persisting the transposition table between runs
+    TT_FILE = os.path.join(os.path.expanduser("~"), ".cache", "chessmancer", "ai_transpositions.pkl")
+    
+    # File remembering where Stockfish was found, so later runs skip the search
+    STOCKFISH_PATH_CACHE = os.path.join(os.path.expanduser("~"), ".chessmancer", "stockfish_path")
+    
+    # Centipawn scale of the weighted draw among candidate moves
+    MULTIPV_TEMPERATURE = 100
+    
+    # Seconds to wait for the engine to quit before killing it
+    QUIT_TIMEOUT = 1.0
+    
+    # Buffer size used when streaming the Stockfish download to disk
+    DOWNLOAD_CHUNK_SIZE = 1 << 20
+    
+    def __init__(self, difficulty: int = 10, time_limit: float = 0.1,
+                 tt_file: Optional[str] = TT_FILE, ponder: bool = False,
+                 threads: Optional[int] = None, hash_mb: Optional[int] = None,
+                 book_file: Optional[str] = "book.bin", multipv: int = 3):
         """
         Initialize the chess AI.
         
         Args:
             difficulty: The difficulty level (1-20), higher is stronger
             time_limit: Time limit for engine analysis in seconds
+            tt_file: File used to persist the transposition table between games
+                (default: in the per-user cache directory), or None to keep it
+                in memory only
+            ponder: Let the engine keep thinking on the opponent's time
+            threads: Number of engine search threads (default: half the CPU cores,
+                capped at MAX_ENGINE_THREADS)
+            hash_mb: Engine hash table size in MB (default: based on available memory)
+            book_file: Polyglot opening book consulted before searching, if it exists
+            multipv: Number of candidate moves scored by a single search below
+                full strength; one of them is picked with a score-weighted draw
         """
         self.difficulty = min(max(difficulty, 1), 20)  # Clamp between 1 and 20
         self.time_limit = time_limit
+        self.ponder = ponder
+        self.multipv = max(1, multipv)
         self.engine = None
-        self.board = chess.Board()
+        self.board = ZobristBoard()
+        # Moves (in our board coordinates) that have been pushed onto self.board
+        self._applied_moves: List[Tuple[Tuple[int, int], Tuple[int, int]]] = []
+        # Identifies the current game; the engine only receives ucinewgame when it changes
+        self._game = object()
+        
+        # Background search started by start_thinking()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._search: Optional[Future] = None
+        self._search_key: Optional[int] = None
+        
+        # Transposition table: (difficulty, zobrist hash) -> the scored candidate
+        # moves, as ((from_square, to_square, promotion, score), ...)
+        self.tt_file = tt_file
+        self._tt: "OrderedDict[Tuple[int, int], Tuple[Tuple[int, int, Optional[int], int], ...]]" = OrderedDict()
+        self._load_transpositions()
+        
+        # Opening book (memory-mapped, so lookups are cheap binary searches)
+        self._book: Optional[chess.polyglot.MemoryMappedReader] = None
+        if book_file and os.path.exists(book_file):
+            try:
+                self._book = chess.polyglot.open_reader(book_file)
+            except Exception as e:
+                print(f"Error loading opening book: {e}")
         
         # Try to find Stockfish executable
+        self._engine_lock = threading.Lock()
+        self._closed = False
+        # Close the engine at exit if the caller forgot to; the weak reference
+        # keeps the hook from holding the AI alive
+        self._atexit_hook = lambda ref=weakref.ref(self): ref() and ref().close()
+        atexit.register(self._atexit_hook)
+        self._download_thread: Optional[threading.Thread] = None
         self.stockfish_path = self._find_stockfish()
-        if not self.stockfish_path:
-            print("Stockfish not found. Downloading Stockfish...")
-            self.stockfish_path = self._download_stockfish()
-        
         if self.stockfish_path:
+            self._start_engine(threads, hash_mb)
+        else:
+            # Download in the background; random moves are used until the engine is ready
+            print("Stockfish not found. Downloading Stockfish...")
+            self._download_thread = threading.Thread(
+                target=self._download_and_start_engine,
+                args=(threads, hash_mb),
+                daemon=True
+            )
+            self._download_thread.start()
+    
+    def _start_engine(self, threads: Optional[int], hash_mb: Optional[int]) -> None:
+        """Launch and configure the Stockfish engine at self.stockfish_path."""
+        with self._engine_lock:
+            if self._closed:
+                return
+            
             try:
                 self.engine = chess.engine.SimpleEngine.popen_uci(self.stockfish_path)
-                # Set engine options based on difficulty
-                self.engine.configure({"Skill Level": self.difficulty})
+                # Set engine options based on difficulty and the host machine
+                self.engine.configure(self._engine_options(threads, hash_mb))
                 print(f"Stockfish engine loaded successfully at {self.stockfish_path}")
             except Exception as e:
                 print(f"Error initializing Stockfish engine: {e}")
                 self.engine = None
-        else:
+    
+    def _download_and_start_engine(self, threads: Optional[int], hash_mb: Optional[int]) -> None:
+        """Download Stockfish and start the engine once it is available."""
+        stockfish_path = self._download_stockfish()
+        if not stockfish_path:
             print("Could not find or download Stockfish. AI will use random moves.")
+            return
+        
+        self.stockfish_path = stockfish_path
+        self._write_cached_stockfish_path(stockfish_path)
+        self._start_engine(threads, hash_mb)
+    
+    def _engine_options(self, threads: Optional[int], hash_mb: Optional[int]) -> dict:
+        """Build the UCI options for the engine, skipping any it doesn't support."""
+        if threads is None:
+            threads = (os.cpu_count() or 2) // 2
+        threads = min(max(threads, 1), self.MAX_ENGINE_THREADS)
+        
+        if hash_mb is None:
+            hash_mb = self._default_hash_size()
+        
+        options = {
+            "Skill Level": self.difficulty,
+            "Threads": threads,
+            "Hash": hash_mb
+        }
+        return {name: value for name, value in options.items() if name in self.engine.options}
+    
+    def _default_hash_size(self) -> int:
+        """Pick an engine hash size of about a quarter of the available memory."""
+        try:
+            available = os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+        except (AttributeError, ValueError, OSError):
+            # sysconf is not available on Windows and lacks SC_AVPHYS_PAGES on macOS
+            return self.MIN_HASH_MB * 2
+        
+        return min(self.MAX_HASH_MB, max(self.MIN_HASH_MB, available // (4 * 1024 * 1024)))
     
     def _find_stockfish(self) -> Optional[str]:
         """Try to find the Stockfish executable on the system."""
+        # Reuse the location found on a previous run if it is still valid
+        cached_path = self._read_cached_stockfish_path()
+        if cached_path:
+            return cached_path
+        
         # Check if Stockfish is in the current directory
         system = platform.system()
         
@@ -53,34 +271,46 @@ class ChessAI:
         else:  # Linux and others
             executable_names = ["stockfish", "stockfish-ubuntu-x86-64", "stockfish-ubuntu-20.04-x86-64"]
         
+        stockfish_path = None
+        
         # Check current directory
         for name in executable_names:
             if os.path.exists(name) and os.access(name, os.X_OK):
-                return os.path.abspath(name)
+                stockfish_path = os.path.abspath(name)
+                break
+        
+        # Check if Stockfish is in PATH (a pure-Python scan, no which/where subprocess)
+        if not stockfish_path:
+            stockfish_path = shutil.which("stockfish")
         
-        # Check if Stockfish is in PATH
+        if stockfish_path:
+            self._write_cached_stockfish_path(stockfish_path)
+        return stockfish_path
+    
+    def _read_cached_stockfish_path(self) -> Optional[str]:
+        """Return the cached Stockfish location if it still points to an executable."""
         try:
-            if system == "Windows":
-                # On Windows, check if stockfish is in PATH
-                result = subprocess.run(["where", "stockfish"], capture_output=True, text=True)
-                if result.returncode == 0:
-                    return result.stdout.strip().split("\n")[0]
-            else:
-                # On Unix-like systems, use which
-                result = subprocess.run(["which", "stockfish"], capture_output=True, text=True)
-                if result.returncode == 0:
-                    return result.stdout.strip()
-        except Exception:
-            pass
+            with open(self.STOCKFISH_PATH_CACHE, 'r') as f:
+                path = f.read().strip()
+        except OSError:
+            return None
         
+        if path and os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
         return None
     
+    def _write_cached_stockfish_path(self, path: str) -> None:
+        """Remember the Stockfish location for future runs."""
+        try:
+            os.makedirs(os.path.dirname(self.STOCKFISH_PATH_CACHE), exist_ok=True)
+            with open(self.STOCKFISH_PATH_CACHE, 'w') as f:
+                f.write(path)
+        except OSError as e:
+            print(f"Error caching Stockfish location: {e}")
+    
     def _download_stockfish(self) -> Optional[str]:
         """Download the appropriate Stockfish binary for the current platform."""
         import urllib.request
-        import zipfile
-        import tarfile
-        import shutil
         
         system = platform.system()
         machine = platform.machine().lower()
@@ -119,206 +349,378 @@ class ChessAI:
             print(f"Unsupported operating system: {system}")
             return None
         
+        # The binary is written here and only renamed into place once complete
+        partial_name = final_name + ".part"
         try:
-            # Download the file
+            # Stream the download; tarballs are extracted on the fly without touching disk
             print(f"Downloading Stockfish from {url}...")
-            urllib.request.urlretrieve(url, zip_file)
-            
-            # Extract the file
-            if zip_file.endswith(".zip"):
-                with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-                    zip_ref.extractall("stockfish_temp")
-            elif zip_file.endswith(".tar.gz"):
-                with tarfile.open(zip_file, 'r:gz') as tar_ref:
-                    tar_ref.extractall("stockfish_temp")
+            with urllib.request.urlopen(url) as response:
+                if zip_file.endswith(".tar.gz"):
+                    found = self._extract_tar_member(response, binary_name, partial_name)
+                else:
+                    with open(zip_file, 'wb') as f:
+                        shutil.copyfileobj(response, f, self.DOWNLOAD_CHUNK_SIZE)
+                    found = self._extract_zip_member(zip_file, binary_name, partial_name)
             
-            # Find the binary
-            stockfish_path = None
-            for root, dirs, files in os.walk("stockfish_temp"):
-                for file in files:
-                    if binary_name in file:
-                        stockfish_path = os.path.join(root, file)
-                        break
-                if stockfish_path:
-                    break
-            
-            if not stockfish_path:
+            if not found:
                 print("Could not find Stockfish binary in the downloaded package.")
                 return None
             
-            # Copy to final location and make executable
-            shutil.copy(stockfish_path, final_name)
-            os.chmod(final_name, 0o755)  # Make executable
-            
-            # Clean up
-            if os.path.exists(zip_file):
-                os.remove(zip_file)
-            if os.path.exists("stockfish_temp"):
-                shutil.rmtree("stockfish_temp")
+            # Move into place only once complete and make executable
+            os.chmod(partial_name, 0o755)
+            os.replace(partial_name, final_name)
             
             return os.path.abspath(final_name)
         
         except Exception as e:
             print(f"Error downloading Stockfish: {e}")
             return None
+        
+        finally:
+            # Clean up the archive and any binary that was not moved into place
+            for leftover in (zip_file, partial_name):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+    
+    def _extract_tar_member(self, fileobj, binary_name: str, dest: str) -> bool:
+        """Extract the Stockfish binary from a streamed .tar.gz into dest."""
+        import tarfile
+        
+        with tarfile.open(fileobj=fileobj, mode='r|gz') as tar_ref:
+            for member in tar_ref:
+                if member.isfile() and binary_name in os.path.basename(member.name):
+                    with tar_ref.extractfile(member) as src, open(dest, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, self.DOWNLOAD_CHUNK_SIZE)
+                    return True
+        return False
+    
+    def _extract_zip_member(self, zip_file: str, binary_name: str, dest: str) -> bool:
+        """Extract the Stockfish binary from a downloaded .zip into dest."""
+        import zipfile
+        
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            # Look the binary up in the archive index and extract only that member
+            member = next(
+                (name for name in zip_ref.namelist() if binary_name in os.path.basename(name)),
+                None
+            )
+            if member is None:
+                return False
+            
+            with zip_ref.open(member) as src, open(dest, 'wb') as dst:
+                shutil.copyfileobj(src, dst, self.DOWNLOAD_CHUNK_SIZE)
+        return True
     
     def update_board(self, moves: List[Tuple[Tuple[int, int], Tuple[int, int]]]) -> None:
         """
         Update the internal chess board with the moves made in the game.
         
+        Only the moves that are not yet on the internal board are applied. If the
+        history diverges from what was applied (e.g. a take-back), the board is
+        unwound to the last common move first.
+        
         Args:
             moves: List of moves as ((from_row, from_col), (to_row, to_col))
         """
-        # Reset the board
-        self.board = chess.Board()
+        board = self.board
+        applied = self._applied_moves
+        common = len(applied)
+        if moves[:common] != applied:
+            # Find the first move where the histories differ and unwind to it
+            common = 0
+            for applied_move, move in zip(applied, moves):
+                if applied_move != move:
+                    break
+                common += 1
+            while len(applied) > common:
+                board.pop()
+                applied.pop()
         
-        # Apply all moves
-        for i, (from_pos, to_pos) in enumerate(moves):
+        # Apply only the new moves
+        for from_pos, to_pos in moves[common:]:
             from_row, from_col = from_pos
             to_row, to_col = to_pos
             
             # Convert to chess notation (e.g., e2e4)
-            from_square = chess.square(from_col, 7 - from_row)  # Flip row because chess.py uses 0 for bottom row
-            to_square = chess.square(to_col, 7 - to_row)
-            
-            # Check if it's a castling move
-            is_castling = False
-            piece = self.board.piece_at(from_square)
-            if piece and piece.piece_type == chess.KING:
-                # Kingside castling
-                if from_col == 4 and to_col == 6:
-                    # Try to find the castling move in legal moves
-                    for legal_move in self.board.legal_moves:
-                        if (legal_move.from_square == from_square and 
-                            legal_move.to_square == to_square and 
-                            self.board.is_castling(legal_move)):
-                            self.board.push(legal_move)
-                            is_castling = True
-                            break
-                # Queenside castling
-                elif from_col == 4 and to_col == 2:
-                    # Try to find the castling move in legal moves
-                    for legal_move in self.board.legal_moves:
-                        if (legal_move.from_square == from_square and 
-                            legal_move.to_square == to_square and 
-                            self.board.is_castling(legal_move)):
-                            self.board.push(legal_move)
-                            is_castling = True
-                            break
+            from_square = _SQ_FROM_RC[from_row][from_col]
+            to_square = _SQ_FROM_RC[to_row][to_col]
             
-            if is_castling:
-                continue
+            # Castling (king moves two squares) and en passant (pawn moves diagonally
+            # to an empty square) are recognised by python-chess from the plain move,
+            # so only promotions need extra information. The promotion rank is
+            # checked first so the piece is only looked up for last-rank moves.
+            promotion = None
+            if to_row in (0, 7) and board.piece_type_at(from_square) == chess.PAWN:
+                promotion = chess.QUEEN
             
-            # Check for en passant
-            is_en_passant = False
-            if piece and piece.piece_type == chess.PAWN:
-                # Check if it's a diagonal move to an empty square (characteristic of en passant)
-                if from_col != to_col and self.board.piece_at(to_square) is None:
-                    # Try to find the en passant move in legal moves
-                    for legal_move in self.board.legal_moves:
-                        if (legal_move.from_square == from_square and 
-                            legal_move.to_square == to_square and 
-                            self.board.is_en_passant(legal_move)):
-                            self.board.push(legal_move)
-                            is_en_passant = True
-                            break
-            
-            if is_en_passant:
-                continue
-            
-            # Create the move
-            move = chess.Move(from_square, to_square)
-            
-            # Check if it's a promotion
-            if self.board.piece_at(from_square) and self.board.piece_at(from_square).piece_type == chess.PAWN:
-                if to_row == 0 or to_row == 7:  # Promotion rank
-                    move = chess.Move(from_square, to_square, promotion=chess.QUEEN)
+            move = chess.Move(from_square, to_square, promotion=promotion)
             
             # Apply the move
-            if move in self.board.legal_moves:
-                self.board.push(move)
+            if board.is_legal(move):
+                board.push(move)
+                applied.append((from_pos, to_pos))
             else:
                 print(f"Warning: Illegal move {move} not applied to AI's board")
-                # Try to find a similar legal move
-                for legal_move in self.board.legal_moves:
-                    if legal_move.from_square == from_square and legal_move.to_square == to_square:
-                        self.board.push(legal_move)
-                        print(f"Applied similar legal move {legal_move} instead")
-                        break
+    
+    def _load_transpositions(self) -> None:
+        """Load the persisted transposition table, if there is one."""
+        if not self.tt_file or not os.path.exists(self.tt_file):
+            return
+        
+        try:
+            with open(self.tt_file, 'rb') as f:
+                self._tt = OrderedDict(pickle.load(f))
+        except Exception as e:
+            print(f"Error loading transposition table: {e}")
+            self._tt = OrderedDict()
+    
+    def _save_transpositions(self) -> None:
+        """Persist the transposition table so it survives across games."""
+        if not self.tt_file or not self._tt:
+            return
+        
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.tt_file)), exist_ok=True)
+            with open(self.tt_file, 'wb') as f:
+                pickle.dump(self._tt, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            print(f"Error saving transposition table: {e}")
+    
+    def _probe_transposition(self, board: ZobristBoard, difficulty: Optional[int] = None) -> Optional[chess.Move]:
+        """
+        Return a move for a cached position at a difficulty (default: the current one), if any.
+        
+        The move is drawn again from the cached candidates on every hit, so a
+        repeated position is not always answered the same way below full strength.
+        """
+        if difficulty is None:
+            difficulty = self.difficulty
+        key = (difficulty, board.zobrist_key())
+        entry = self._tt.get(key)
+        if entry is None:
+            return None
+        
+        candidates = [
+            (chess.Move(from_square, to_square, promotion), score)
+            for from_square, to_square, promotion, score in entry
+        ]
+        # Guard against hash collisions
+        if not all(board.is_legal(move) for move, _ in candidates):
+            del self._tt[key]
+            return None
+        
+        self._tt.move_to_end(key)
+        return self._choose_candidate(candidates)
+    
+    def _store_transposition(self, board: ZobristBoard, candidates: List[Tuple[chess.Move, int]],
+                             difficulty: Optional[int] = None) -> None:
+        """Cache the scored candidate moves for a position at a difficulty (default: the current one)."""
+        if difficulty is None:
+            difficulty = self.difficulty
+        key = (difficulty, board.zobrist_key())
+        self._tt[key] = tuple(
+            (move.from_square, move.to_square, move.promotion, score) for move, score in candidates
+        )
+        self._tt.move_to_end(key)
+        if len(self._tt) > self.TT_MAX_ENTRIES:
+            self._tt.popitem(last=False)  # Evict the least recently used entry
+    
+    def _probe_book(self, board: chess.Board) -> Optional[chess.Move]:
+        """Pick a weighted move from the opening book, or None when out of book."""
+        if self._book is None:
+            return None
+        try:
+            return self._book.weighted_choice(board, random=_RNG).move
+        except IndexError:
+            return None
+    
+    def _search_position(self, board: ZobristBoard, difficulty: int) -> Optional[chess.Move]:
+        """
+        Find the best move for a position without applying it.
+        
+        Book positions and positions that were already searched are answered
+        from the opening book or the transposition table without consulting
+        the engine. The difficulty is passed in rather than read from self,
+        since a background search can outlive a change of difficulty.
+        """
+        move = self._probe_book(board)
+        if move is not None:
+            return move
+        
+        move = self._probe_transposition(board, difficulty)
+        if move is None and self.engine:
+            if difficulty < 20 and self.multipv > 1:
+                # Score the top candidates in one search and pick among them
+                infos = self.engine.analyse(
+                    board,
+                    self._search_limit(difficulty),
+                    multipv=self.multipv,
+                    game=self._game
+                )
+                candidates = self._candidate_moves(infos)
+            else:
+                # Get the best move from the engine
+                result = self.engine.play(
+                    board, 
+                    self._search_limit(difficulty),
+                    game=self._game,
+                    ponder=self.ponder
+                )
+                candidates = [(result.move, 0)] if result.move else []
+            
+            # Cache all candidates rather than the pick, so later hits draw again
+            if candidates:
+                self._store_transposition(board, candidates, difficulty)
+            move = self._choose_candidate(candidates)
+        
+        return move
+    
+    def _search_limit(self, difficulty: Optional[int] = None) -> chess.engine.Limit:
+        """
+        Search budget for a difficulty (default: the current one).
+        
+        Weak levels search to a shallow fixed depth, which finishes long before
+        the time limit; stronger levels use the full time limit.
+        """
+        if difficulty is None:
+            difficulty = self.difficulty
+        if difficulty <= 10:
+            return chess.engine.Limit(depth=max(1, difficulty // 2))
+        return chess.engine.Limit(time=self.time_limit)
+    
+    def _candidate_moves(self, infos: List[dict]) -> List[Tuple[chess.Move, int]]:
+        """Extract (move, centipawn score) pairs from multipv analysis results."""
+        return [
+            (info["pv"][0], info["score"].relative.score(mate_score=10000))
+            for info in infos if info.get("pv") and "score" in info
+        ]
+    
+    def _choose_candidate(self, candidates: List[Tuple[chess.Move, int]]) -> Optional[chess.Move]:
+        """
+        Pick one of the scored candidate moves, weighted by score.
+        
+        Each candidate gets weight exp((score - best) / MULTIPV_TEMPERATURE),
+        so moves close to the best one are picked often and clear mistakes rarely.
+        """
+        if not candidates:
+            return None
+        
+        best = max(score for _, score in candidates)
+        weights = [math.exp((score - best) / self.MULTIPV_TEMPERATURE) for _, score in candidates]
+        return _RNG.choices([move for move, _ in candidates], weights=weights)[0]
+    
+    def start_thinking(self) -> None:
+        """
+        Start searching the current position in the background.
+        
+        The result is picked up by the next call to get_best_move, so the
+        search overlaps with whatever the caller does in the meantime
+        (e.g. rendering frames while the AI "thinks").
+        """
+        if self._search is not None or self.board.is_game_over():
+            return
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chess-ai")
+        
+        self._search_key = self.board.zobrist_key()
+        self._search = self._executor.submit(self._search_position, self.board.copy(), self.difficulty)
+    
+    def _collect_search(self) -> Optional[chess.Move]:
+        """Wait for the background search and return its move if it is for the current position."""
+        search, self._search = self._search, None
+        if search is None:
+            return None
+        
+        move = search.result()
+        if self._search_key != self.board.zobrist_key():
+            return None
+        return move
     
     def get_best_move(self) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
         """
         Get the best move according to the engine.
         
+        Uses the result of a background search started with start_thinking
+        when it is available for the current position.
+        
         Returns:
             A tuple ((from_row, from_col), (to_row, to_col)) or None if no move is found
         """
-        if not self.engine:
-            return self._get_random_move()
-        
         try:
-            # Get the best move from the engine
-            result = self.engine.play(
-                self.board, 
-                chess.engine.Limit(time=self.time_limit)
-            )
-            
-            move = result.move
-            if not move:
-                return None
-            
-            # Convert from chess.py notation to our board coordinates
-            from_square = move.from_square
-            to_square = move.to_square
-            
-            from_col = chess.square_file(from_square)
-            from_row = 7 - chess.square_rank(from_square)  # Flip row because chess.py uses 0 for bottom row
-            
-            to_col = chess.square_file(to_square)
-            to_row = 7 - chess.square_rank(to_square)
-            
-            # Apply the move to the internal board
-            self.board.push(move)
-            
-            return ((from_row, from_col), (to_row, to_col))
-        
+            move = self._collect_search()
+            if move is None:
+                move = self._search_position(self.board, self.difficulty)
         except Exception as e:
             print(f"Error getting move from engine: {e}")
             return self._get_random_move()
+        
+        if move is None:
+            return None if self.engine else self._get_random_move()
+        
+        # Apply the move to the internal board
+        return self._push_move(move)
+    
+    def _push_move(self, move: chess.Move) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+        """Push a move onto the internal board and return it in our board coordinates."""
+        # Convert from chess.py notation to our board coordinates
+        board_move = (_RC_FROM_SQ[move.from_square], _RC_FROM_SQ[move.to_square])
+        
+        self.board.push(move)
+        self._applied_moves.append(board_move)
+        return board_move
     
     def _get_random_move(self) -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
         """Get a random legal move if the engine is not available."""
-        if self.board.is_game_over():
+        board = self.board
+        # Draws that still leave legal moves; checkmate and stalemate show up
+        # as an empty move list below, so moves are only generated once
+        if (board.is_insufficient_material() or board.is_seventyfive_moves()
+                or board.is_fivefold_repetition()):
             return None
         
         # Get a random legal move
         try:
-            import random
-            legal_moves = list(self.board.legal_moves)
+            legal_moves = list(board.generate_legal_moves())
             if not legal_moves:
                 return None
             
-            move = random.choice(legal_moves)
-            
-            # Convert from chess.py notation to our board coordinates
-            from_square = move.from_square
-            to_square = move.to_square
-            
-            from_col = chess.square_file(from_square)
-            from_row = 7 - chess.square_rank(from_square)
-            
-            to_col = chess.square_file(to_square)
-            to_row = 7 - chess.square_rank(to_square)
+            move = _RNG.choice(legal_moves)
             
             # Apply the move to the internal board
-            self.board.push(move)
-            
-            return ((from_row, from_col), (to_row, to_col))
+            return self._push_move(move)
         
         except Exception as e:
             print(f"Error getting random move: {e}")
             return None
     
+    def new_game(self, difficulty: Optional[int] = None) -> None:
+        """
+        Start a new game while keeping the engine process running.
+        
+        Args:
+            difficulty: Optional new difficulty level (1-20)
+        """
+        # Any running search belongs to the previous game; let it finish so it
+        # doesn't race the engine reconfiguration below
+        search, self._search = self._search, None
+        if search is not None and not search.cancel():
+            wait([search])
+        
+        self.board = ZobristBoard()
+        self._applied_moves = []
+        self._game = object()
+        
+        if difficulty is not None:
+            difficulty = min(max(difficulty, 1), 20)
+            if difficulty != self.difficulty:
+                self.difficulty = difficulty
+                if self.engine:
+                    try:
+                        self.engine.configure({"Skill Level": self.difficulty})
+                    except Exception as e:
+                        print(f"Error configuring Stockfish engine: {e}")
+    
     def is_game_over(self) -> bool:
         """Check if the game is over according to chess rules."""
         return self.board.is_game_over()
@@ -342,26 +744,53 @@ class ChessAI:
             return "Draw"
     
     def close(self) -> None:
-        """Close the engine properly."""
+        """Close the engine properly and persist the transposition table."""
+        with self._engine_lock:
+            if self._closed:
+                return
+            # Stops a background download from starting the engine afterwards
+            self._closed = True
+        atexit.unregister(self._atexit_hook)
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            self._search = None
+        self._save_transpositions()
+        if self._book:
+            self._book.close()
+            self._book = None
         if self.engine:
-            self.engine.quit()
+            try:
+                self.engine.timeout = self.QUIT_TIMEOUT
+                self.engine.quit()
+            except Exception as e:
+                print(f"Engine did not quit cleanly, killing it: {e}")
+                self.engine.close()
             self.engine = None
-
-# Test the AI
-if __name__ == "__main__":
-    ai = ChessAI(difficulty=10)
     
-    # Make a few moves to test
-    moves = []
+    def __enter__(self) -> "ChessAI":
+        return self
     
-    # Make 5 moves
-    for _ in range(5):
-        move = ai.get_best_move()
-        if move:
-            print(f"AI suggests move: {move}")
-            moves.append(move)
-        else:
-            print("No move found or game over")
-            break
+    def __exit__(self, *exc_info) -> None:
+        self.close()
     
-    ai.close() 
\ No newline at end of file
+    def __del__(self):
+        # __init__ may have failed before the exit hook was set up
+        if hasattr(self, "_atexit_hook"):
+            self.close()
+
+# Test the AI
+if __name__ == "__main__":
+    with ChessAI(difficulty=10) as ai:
+        # Make a few moves to test
+        moves = []
+        
+        # Make 5 moves
+        for _ in range(5):
+            move = ai.get_best_move()
+            if move:
+                print(f"AI suggests move: {move}")
+                moves.append(move)
+            else:
+                print("No move found or game over")
+                break 
\ No newline at end of file
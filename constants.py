@@ -1,4 +1,6 @@
+import hashlib
 import os
+import pickle
 import pygame
 import random
 from typing import Tuple
@@ -66,59 +68,129 @@ KING = 'king'
 MODE_HUMAN_VS_HUMAN = 0
 MODE_HUMAN_VS_AI = 1
 
-# Initialize pygame
-pygame.init()
+# Blend per-pixel alpha with SDL2's blitter, which is faster than pygame's own
+os.environ.setdefault('PYGAME_BLEND_ALPHA_SDL2', '1')
 
-# Set up the display with hardware acceleration if available
-flags = pygame.HWSURFACE | pygame.DOUBLEBUF
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), flags)
-pygame.display.set_caption("Chessmancer")
+def init_display() -> pygame.Surface:
+    """
+    Initialize pygame and open the game window, returning the display surface.
+    
+    Importing this module has no side effects on pygame; call this before
+    creating images, since they are converted to the display's pixel format.
+    If the window is already open its surface is returned.
+    """
+    screen = pygame.display.get_surface()
+    if screen is not None:
+        return screen
+    
+    # Initialize pygame
+    pygame.init()
+    
+    # Set up the display with hardware acceleration if available
+    flags = pygame.HWSURFACE | pygame.DOUBLEBUF
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT), flags)
+    pygame.display.set_caption("Chessmancer")
+    return screen
+
+# Rendered piece images are cached here between runs. Bump the version when
+# the rendering changes so stale caches are ignored.
+PIECE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "chessmancer")
+PIECE_CACHE_VERSION = 2
+
+PIECE_TYPES = [PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING]
+PIECE_COLORS = ['white', 'black']
+
+def _piece_filename(color: str, piece_type: str) -> str:
+    return f"pieces/{color}-{piece_type}.png"
+
+def _piece_cache_file() -> str:
+    """Path of the piece image cache for the current source images and settings."""
+    key = hashlib.sha1(f"{PIECE_CACHE_VERSION}:{SQUARE_SIZE}".encode())
+    for color in PIECE_COLORS:
+        for piece_type in PIECE_TYPES:
+            filename = _piece_filename(color, piece_type)
+            stat = os.stat(filename)
+            key.update(f"{filename}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return os.path.join(PIECE_CACHE_DIR, f"pieces_v{key.hexdigest()[:16]}.pkl")
 
 def create_piece_images() -> dict:
-    """Load chess piece images from PNG files and return them in a dictionary."""
+    """
+    Load chess piece images and return them in a dictionary.
+    
+    The rendered images are cached on disk, so the PNGs are only scaled and
+    shadowed again when they or the square size change.
+    
+    The returned images have pre-multiplied alpha and must be blitted with
+    special_flags=pygame.BLEND_PREMULTIPLIED; don't combine them with
+    set_alpha or a colorkey.
+    """
+    cache_file = _piece_cache_file()
+    try:
+        with open(cache_file, 'rb') as f:
+            cached = pickle.load(f)
+        return {
+            key: pygame.image.fromstring(data, size, 'RGBA').convert_alpha().premul_alpha()
+            for key, (data, size) in cached.items()
+        }
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Error loading piece image cache: {e}")
+    
+    pieces = _render_piece_images()
+    
+    try:
+        os.makedirs(PIECE_CACHE_DIR, exist_ok=True)
+        cached = {
+            key: (pygame.image.tostring(image, 'RGBA'), image.get_size())
+            for key, image in pieces.items()
+        }
+        with open(cache_file, 'wb') as f:
+            pickle.dump(cached, f, pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"Error saving piece image cache: {e}")
+    
+    return {key: image.premul_alpha() for key, image in pieces.items()}
+
+def _render_piece_images() -> dict:
+    """Load chess piece images from PNG files and render them with a drop shadow."""
     pieces = {}
-    piece_types = [PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING]
-    colors = ['white', 'black']
     
-    for color in colors:
-        for piece_type in piece_types:
+    for color in PIECE_COLORS:
+        for piece_type in PIECE_TYPES:
             # Construct the filename
-            filename = f"pieces/{color}-{piece_type}.png"
+            filename = _piece_filename(color, piece_type)
             
             # Load the image
             original_image = pygame.image.load(filename).convert_alpha()
             
-            # Scale the image to fit the square size
-            scaled_image = pygame.transform.scale(original_image, (SQUARE_SIZE, SQUARE_SIZE))
+            # Scale the image to fit the square size (filtered, so edges stay smooth)
+            scaled_image = pygame.transform.smoothscale(original_image, (SQUARE_SIZE, SQUARE_SIZE))
             
-            # Add a subtle drop shadow
-            shadow = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+            # Add a subtle drop shadow: semi-transparent black wherever the
+            # image is not too transparent, offset down and to the right
             shadow_offset = 3
-            
-            # Create a copy of the scaled image for shadow creation
-            temp_image = scaled_image.copy()
-            
-            # Create shadow by offsetting a darkened copy of the image
-            for y in range(SQUARE_SIZE):
-                for x in range(SQUARE_SIZE):
-                    if x < SQUARE_SIZE - shadow_offset and y < SQUARE_SIZE - shadow_offset:
-                        pixel_color = temp_image.get_at((x, y))
-                        if pixel_color[3] > 50:  # If pixel is not too transparent
-                            shadow_x = min(x + shadow_offset, SQUARE_SIZE - 1)
-                            shadow_y = min(y + shadow_offset, SQUARE_SIZE - 1)
-                            shadow.set_at((shadow_x, shadow_y), (0, 0, 0, 50))  # Semi-transparent black
+            shadow_mask = pygame.mask.from_surface(scaled_image, 50)
+            shadow = shadow_mask.to_surface(setcolor=(0, 0, 0, 50), unsetcolor=(0, 0, 0, 0))
             
             # Create final image with shadow
             final_image = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-            final_image.blit(shadow, (0, 0))
+            final_image.blit(shadow, (shadow_offset, shadow_offset))
             final_image.blit(scaled_image, (0, 0))
             
-            pieces[f'{color}_{piece_type}'] = final_image
+            # Match the display's pixel format so board blits take the fast path
+            pieces[f'{color}_{piece_type}'] = final_image.convert_alpha()
     
     return pieces
 
 def create_tile_images() -> dict:
-    """Create images for dungeon tiles."""
+    """
+    Create images for dungeon tiles.
+
+    Floor, wall and door tiles are fully opaque and are converted without
+    per-pixel alpha so they take the fast blit path; only the figures that
+    are drawn over them keep an alpha channel.
+    """
     tiles = {}
     
     # Floor tile (light gray)
@@ -129,7 +201,7 @@ def create_tile_images() -> dict:
         x = random.randint(0, TILE_SIZE - 3)
         y = random.randint(0, TILE_SIZE - 3)
         pygame.draw.rect(floor, (160, 160, 160), pygame.Rect(x, y, 3, 3))
-    tiles[FLOOR_TILE] = floor
+    tiles[FLOOR_TILE] = floor.convert()
     
     # Wall tile (dark gray with texture)
     wall = pygame.Surface((TILE_SIZE, TILE_SIZE))
@@ -141,7 +213,7 @@ def create_tile_images() -> dict:
             brick = pygame.Rect(x, y, 18, 8)
             pygame.draw.rect(wall, (120, 120, 120), brick)
             pygame.draw.rect(wall, (80, 80, 80), brick, 1)
-    tiles[WALL_TILE] = wall
+    tiles[WALL_TILE] = wall.convert()
     
     # Door tile (brown)
     door = pygame.Surface((TILE_SIZE, TILE_SIZE))
@@ -149,7 +221,7 @@ def create_tile_images() -> dict:
     # Add door details
     pygame.draw.rect(door, (120, 80, 40), pygame.Rect(5, 5, TILE_SIZE - 10, TILE_SIZE - 10))
     pygame.draw.circle(door, (200, 200, 0), (TILE_SIZE - 10, TILE_SIZE // 2), 3)  # Doorknob
-    tiles[DOOR_TILE] = door
+    tiles[DOOR_TILE] = door.convert()
     
     # Enemy tile (red figure)
     enemy = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
@@ -157,7 +229,7 @@ def create_tile_images() -> dict:
     # Draw a simple enemy figure
     pygame.draw.circle(enemy, (200, 50, 50), (TILE_SIZE // 2, TILE_SIZE // 3), TILE_SIZE // 4)  # Head
     pygame.draw.rect(enemy, (200, 50, 50), pygame.Rect(TILE_SIZE // 3, TILE_SIZE // 2, TILE_SIZE // 3, TILE_SIZE // 3))  # Body
-    tiles[ENEMY_TILE] = enemy
+    tiles[ENEMY_TILE] = enemy.convert_alpha()
     
     # Chest tile (gold chest)
     chest = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
@@ -166,7 +238,7 @@ def create_tile_images() -> dict:
     pygame.draw.rect(chest, (150, 100, 50), pygame.Rect(5, TILE_SIZE // 2, TILE_SIZE - 10, TILE_SIZE // 3))  # Chest base
     pygame.draw.rect(chest, (200, 150, 50), pygame.Rect(5, TILE_SIZE // 2 - 5, TILE_SIZE - 10, 10))  # Chest lid
     pygame.draw.rect(chest, (200, 200, 0), pygame.Rect(TILE_SIZE // 2 - 3, TILE_SIZE // 2, 6, 5))  # Lock
-    tiles[CHEST_TILE] = chest
+    tiles[CHEST_TILE] = chest.convert_alpha()
     
     # Player tile (blue figure)
     player = pygame.Surface((TILE_SIZE, TILE_SIZE), pygame.SRCALPHA)
@@ -174,6 +246,6 @@ def create_tile_images() -> dict:
     # Draw a simple player figure
     pygame.draw.circle(player, (50, 100, 200), (TILE_SIZE // 2, TILE_SIZE // 3), TILE_SIZE // 4)  # Head
     pygame.draw.rect(player, (50, 100, 200), pygame.Rect(TILE_SIZE // 3, TILE_SIZE // 2, TILE_SIZE // 3, TILE_SIZE // 3))  # Body
-    tiles[PLAYER_TILE] = player
+    tiles[PLAYER_TILE] = player.convert_alpha()
     
     return tiles 
\ No newline at end of file
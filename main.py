@@ -6,21 +6,40 @@ from typing import List, Tuple, Optional, Dict, Any
 from constants import (
     FPS, BOARD_PX, WINDOW_WIDTH, WINDOW_HEIGHT, SQUARE_SIZE, BLACK,
     MODE_HUMAN_VS_HUMAN, MODE_HUMAN_VS_AI, MODE_CHESS, MODE_DUNGEON,
-    TILE_SIZE, screen, create_piece_images, create_tile_images
+    TILE_SIZE, init_display, create_piece_images, create_tile_images
 )
 from models.chess_board import ChessBoard
 from models.player_inventory import PlayerInventory
 from models.chess_piece import RPGChessPiece
 from models.dungeon import Dungeon, Enemy, Chest
 from models.player import Player
-from ui.button import Button
+from ui.button import Button, ButtonPanel
 from ui.inventory_ui import InventoryUI
 from ui.dungeon_ui import DungeonUI
 
+# What the chess mode buttons and the reset button do, in button order
+BUTTON_ACTIONS = [
+    lambda board: board.reset_game(game_mode=MODE_HUMAN_VS_HUMAN),
+    lambda board: board.reset_game(game_mode=MODE_HUMAN_VS_AI, ai_difficulty=5),
+    lambda board: board.reset_game(game_mode=MODE_HUMAN_VS_AI, ai_difficulty=10),
+    lambda board: board.reset_game(game_mode=MODE_HUMAN_VS_AI, ai_difficulty=15),
+    # Keep the same mode but reset the game
+    lambda board: board.reset_game(),
+]
+
 def main() -> None:
     """Main game loop."""
+    screen = init_display()
     clock = pygame.time.Clock()
     
+    # Only queue the events the loop handles; mouse motion in particular is
+    # read with mouse.get_pos() once per frame, so SDL can drop it
+    pygame.event.set_blocked(None)
+    pygame.event.set_allowed([
+        pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP,
+        pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP, pygame.WINDOWEXPOSED
+    ])
+    
     # Initialize game state
     game_mode = MODE_DUNGEON  # Start in dungeon mode
     
@@ -35,6 +54,7 @@ def main() -> None:
     tile_images = create_tile_images()
     dragging = False
     drag_piece = None
+    drag_image = None
     drag_start_pos = None
     
     # Initialize dungeon
@@ -63,80 +83,58 @@ def main() -> None:
     button_spacing = 15
     
     # Calculate starting Y position for buttons (positioned at the bottom of the UI panel)
-    button_start_y = WINDOW_HEIGHT - (button_height + button_spacing) * 6 - button_spacing
+    button_stride = button_height + button_spacing
+    button_start_y = WINDOW_HEIGHT - button_stride * 6 - button_spacing
     
-    # Create mode buttons for chess mode
+    # Chess mode buttons as (label, row in the button strip, colors). The order
+    # matches BUTTON_ACTIONS and the indices used when handling clicks: the mode
+    # buttons, then reset, inventory and return to dungeon (only shown in chess
+    # mode), which sits above the others.
+    button_specs = [
+        ("Human vs Human", 0, {}),
+        ("Human vs AI (Easy)", 1, {}),
+        ("Human vs AI (Medium)", 2, {}),
+        ("Human vs AI (Hard)", 3, {}),
+        ("Reset Game", 4, dict(color=(150, 50, 50), hover_color=(180, 70, 70), active_color=(200, 90, 90))),
+        ("Inventory", 5, dict(color=(50, 100, 150), hover_color=(70, 120, 180), active_color=(90, 140, 200))),
+        ("Return to Dungeon", -1, dict(color=(50, 150, 100), hover_color=(70, 180, 120), active_color=(90, 200, 140))),
+    ]
     chess_buttons = [
-        Button(button_x, button_start_y, button_width, button_height, "Human vs Human"),
-        Button(button_x, button_start_y + (button_height + button_spacing), button_width, button_height, "Human vs AI (Easy)"),
-        Button(button_x, button_start_y + (button_height + button_spacing) * 2, button_width, button_height, "Human vs AI (Medium)"),
-        Button(button_x, button_start_y + (button_height + button_spacing) * 3, button_width, button_height, "Human vs AI (Hard)")
+        Button(button_x, button_start_y + button_stride * row, button_width, button_height, text, **colors)
+        for text, row, colors in button_specs
     ]
-    
-    # Add a reset button
-    reset_button = Button(
-        button_x, 
-        button_start_y + (button_height + button_spacing) * 4, 
-        button_width, 
-        button_height, 
-        "Reset Game", 
-        color=(150, 50, 50),
-        hover_color=(180, 70, 70),
-        active_color=(200, 90, 90)
-    )
-    chess_buttons.append(reset_button)
-    
-    # Add an inventory button
-    inventory_button = Button(
-        button_x, 
-        button_start_y + (button_height + button_spacing) * 5, 
-        button_width, 
-        button_height, 
-        "Inventory", 
-        color=(50, 100, 150),
-        hover_color=(70, 120, 180),
-        active_color=(90, 140, 200)
-    )
-    chess_buttons.append(inventory_button)
-    
-    # Add a return to dungeon button (only shown in chess mode)
-    return_button = Button(
-        button_x, 
-        button_start_y - (button_height + button_spacing), 
-        button_width, 
-        button_height, 
-        "Return to Dungeon", 
-        color=(50, 150, 100),
-        hover_color=(70, 180, 120),
-        active_color=(90, 200, 140)
-    )
-    chess_buttons.append(return_button)
+    chess_button_panel = ButtonPanel(chess_buttons)
     
     # Set the active button based on current game mode
-    if chess_board.game_mode == MODE_HUMAN_VS_HUMAN:
-        chess_buttons[0].set_active(True)
-    else:
-        if chess_board.ai_difficulty <= 5:
-            chess_buttons[1].set_active(True)
-        elif chess_board.ai_difficulty <= 10:
-            chess_buttons[2].set_active(True)
-        else:
-            chess_buttons[3].set_active(True)
+    chess_buttons[_mode_button_index(chess_board)].set_active(True)
     
     # Variables for combat transition
     current_enemy = None
     combat_result = None
     
+    # View drawn on the previous frame; switching views pushes the whole screen
+    last_view = None
+    last_drag_rect = None
+    button_states = []
+    button_backgrounds = []
+    
     running = True
+    # Event taken off the queue while idling, handled before anything still queued
+    pending_events = []
     
     while running:
         current_time = time.time()
         mouse_pos = pygame.mouse.get_pos()
         mouse_clicked = False
         
-        for event in pygame.event.get():
+        events = pending_events + pygame.event.get()
+        pending_events = []
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
+            elif event.type == pygame.WINDOWEXPOSED:
+                # The window needs repainting in full, not just the dirty rects
+                last_view = None
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     if show_inventory:
@@ -165,7 +163,7 @@ def main() -> None:
             elif event.type == pygame.MOUSEBUTTONDOWN:
                 if event.button == 1:  # Left mouse button
                     mouse_clicked = True
-                    if game_mode == MODE_CHESS and not show_inventory and mouse_pos[0] < BOARD_PX and not chess_board.animating:
+                    if game_mode == MODE_CHESS and not show_inventory and event.pos[0] < BOARD_PX and not chess_board.animating:
                         # Chess board interaction
                         row, col = chess_board.get_square_at_pos(event.pos)
                         # Store the starting position for drag and drop
@@ -173,6 +171,7 @@ def main() -> None:
                             piece = chess_board.board[row][col]
                             if piece and piece.color == chess_board.turn:
                                 drag_piece = piece
+                                drag_image = piece_images[piece.get_image_key()]
                                 drag_start_pos = (row, col)
                                 chess_board.select_piece(row, col)
                                 dragging = True
@@ -188,7 +187,7 @@ def main() -> None:
                                     chess_board.select_piece(row, col)
             elif event.type == pygame.MOUSEBUTTONUP:
                 if event.button == 1 and dragging:  # Left mouse button
-                    if game_mode == MODE_CHESS and not show_inventory and mouse_pos[0] < BOARD_PX and not chess_board.animating:
+                    if game_mode == MODE_CHESS and not show_inventory and event.pos[0] < BOARD_PX and not chess_board.animating:
                         row, col = chess_board.get_square_at_pos(event.pos)
                         # Only try to move if we're releasing on a different square
                         if drag_start_pos != (row, col):
@@ -199,6 +198,7 @@ def main() -> None:
                                 chess_board.legal_moves = []
                     dragging = False
                     drag_piece = None
+                    drag_image = None
                     drag_start_pos = None
         
         # Handle inventory UI if it's shown
@@ -294,97 +294,128 @@ def main() -> None:
                 chess_board.make_ai_move(piece_images)
             
             # Update buttons
-            for button in chess_buttons:
-                button.update(mouse_pos)
+            chess_button_panel.update(mouse_pos)
             
-            # Handle button clicks
-            for i, button in enumerate(chess_buttons):
-                if button.is_clicked(mouse_pos, mouse_clicked):
-                    # Return to Dungeon button should work even during animations
-                    if i == 6:  # Return to Dungeon button
-                        game_mode = MODE_DUNGEON
-                        # If player won the combat, remove the enemy
-                        if chess_board.game_over and "White wins" in chess_board.game_result and current_enemy:
-                            # Remove the defeated enemy
-                            enemy_x, enemy_y = current_enemy.position
-                            dungeon_tile = dungeon.grid[enemy_y][enemy_x]
-                            dungeon_tile.entity = None
-                            dungeon_ui.add_message(f"Enemy defeated!")
-                            
-                            # Give rewards
-                            _handle_game_rewards(chess_board, player_inventory)
-                            
-                        current_enemy = None
-                    # Other buttons should only work when not animating
-                    elif not chess_board.animating:
-                        if i == 5:  # Inventory button
-                            show_inventory = True
-                        else:
-                            # Reset active state for all buttons
-                            for b in chess_buttons[:5]:  # Only reset game mode buttons
-                                b.set_active(False)
-                            
-                            # Handle chess mode button actions
-                            if i == 0:  # Human vs Human
-                                button.set_active(True)
-                                chess_board.reset_game(game_mode=MODE_HUMAN_VS_HUMAN)
-                            elif i == 1:  # Human vs AI (Easy)
-                                button.set_active(True)
-                                chess_board.reset_game(game_mode=MODE_HUMAN_VS_AI, ai_difficulty=5)
-                            elif i == 2:  # Human vs AI (Medium)
-                                button.set_active(True)
-                                chess_board.reset_game(game_mode=MODE_HUMAN_VS_AI, ai_difficulty=10)
-                            elif i == 3:  # Human vs AI (Hard)
-                                button.set_active(True)
-                                chess_board.reset_game(game_mode=MODE_HUMAN_VS_AI, ai_difficulty=15)
-                            elif i == 4:  # Reset Game
-                                # Keep the same mode but reset the game
-                                chess_board.reset_game()
-                                # Reset the active state for the reset button
-                                button.set_active(False)
-                                # Set the appropriate mode button as active
-                                if chess_board.game_mode == MODE_HUMAN_VS_HUMAN:
-                                    chess_buttons[0].set_active(True)
-                                else:
-                                    if chess_board.ai_difficulty <= 5:
-                                        chess_buttons[1].set_active(True)
-                                    elif chess_board.ai_difficulty <= 10:
-                                        chess_buttons[2].set_active(True)
-                                    else:
-                                        chess_buttons[3].set_active(True)
+            # Handle button clicks; only the button under the mouse can be clicked
+            clicked_button = chess_button_panel.button_at(mouse_pos) if mouse_clicked else None
+            if clicked_button is not None and clicked_button.is_clicked(mouse_pos, mouse_clicked):
+                i = chess_buttons.index(clicked_button)
+                # Return to Dungeon button should work even during animations
+                if i == 6:  # Return to Dungeon button
+                    game_mode = MODE_DUNGEON
+                    # If player won the combat, remove the enemy
+                    if chess_board.game_over and "White wins" in chess_board.game_result and current_enemy:
+                        # Remove the defeated enemy
+                        enemy_x, enemy_y = current_enemy.position
+                        dungeon_tile = dungeon.grid[enemy_y][enemy_x]
+                        dungeon_tile.entity = None
+                        dungeon_ui.add_message(f"Enemy defeated!")
+                        
+                        # Give rewards
+                        _handle_game_rewards(chess_board, player_inventory)
+                        
+                    current_enemy = None
+                # Other buttons should only work when not animating
+                elif not chess_board.animating:
+                    if i == 5:  # Inventory button
+                        show_inventory = True
+                    else:
+                        # Reset active state for all buttons
+                        for b in chess_buttons[:5]:  # Only reset game mode buttons
+                            b.set_active(False)
+                        
+                        # Handle chess mode button actions, then mark the button of the resulting mode
+                        BUTTON_ACTIONS[i](chess_board)
+                        chess_buttons[_mode_button_index(chess_board)].set_active(True)
             
             # Check for game over
             if chess_board.game_over and not chess_board.rewards_given:
                 chess_board.rewards_given = True
         
-        # Clear the screen
-        screen.fill(BLACK)
+        # In the chess view, frames where nothing changed are not drawn at all
+        view = (game_mode, show_inventory)
+        partial_update = view == (MODE_CHESS, False) and last_view == view
+        states = [(button.hovered, button.active) for button in chess_buttons]
+        changed_buttons = [
+            i for i, (state, old_state) in enumerate(zip(states, button_states))
+            if state != old_state
+        ]
+        drag_visible = dragging and drag_piece and not chess_board.animating
+        full_redraw = (not partial_update or chess_board.needs_redraw() or drag_visible or
+                       last_drag_rect is not None)
+        redraw = full_redraw or bool(changed_buttons)
         
-        if show_inventory:
-            # Draw inventory UI
-            inventory_ui.draw(screen, piece_images)
-        elif game_mode == MODE_DUNGEON:
-            # Draw dungeon UI
-            dungeon_ui.draw(screen)
-        else:  # Chess mode
-            # Draw the chess board and pieces
-            chess_board.draw(screen, piece_images)
+        if not full_redraw:
+            # Only a button's hover or active state changed: draw just those
+            # buttons over what was under them in the last frame
+            for i in changed_buttons:
+                screen.blit(button_backgrounds[i], chess_buttons[i].rect)
+                chess_buttons[i].draw(screen)
+            if changed_buttons:
+                pygame.display.update([chess_buttons[i].rect for i in changed_buttons])
+                button_states = states
+        else:
+            # Clear the screen
+            screen.fill(BLACK)
             
-            # Draw the dragged piece at the mouse position if dragging
-            if dragging and drag_piece and not chess_board.animating:
-                image = piece_images[drag_piece.get_image_key()]
-                # Center the piece on the mouse
-                screen.blit(image, (mouse_pos[0] - SQUARE_SIZE // 2, mouse_pos[1] - SQUARE_SIZE // 2))
+            if show_inventory:
+                # Draw inventory UI
+                inventory_ui.draw(screen, piece_images)
+            elif game_mode == MODE_DUNGEON:
+                # Draw dungeon UI
+                dungeon_ui.draw(screen)
+            else:  # Chess mode
+                # Draw the chess board and pieces
+                chess_board.draw(screen, piece_images)
+                
+                # Draw the dragged piece at the mouse position if dragging
+                if drag_visible:
+                    # Center the piece on the mouse
+                    screen.blit(
+                        drag_image,
+                        (mouse_pos[0] - SQUARE_SIZE // 2, mouse_pos[1] - SQUARE_SIZE // 2),
+                        special_flags=pygame.BLEND_PREMULTIPLIED
+                    )
+                
+                # Draw buttons, keeping what lies under them so they can be redrawn on their own
+                button_backgrounds = [screen.subsurface(button.rect).copy() for button in chess_buttons]
+                for button in chess_buttons:
+                    button.draw(screen)
             
-            # Draw buttons
-            for button in chess_buttons:
-                button.draw(screen)
-        
-        # Update the display
-        pygame.display.flip()
+            # Update the display. The chess view only pushes the areas that changed;
+            # the dungeon scrolls and the inventory is cheap, so they flip the whole screen.
+            if partial_update:
+                dirty_rects = chess_board.take_dirty_rects()
+                
+                # The dragged piece dirties its previous and current position
+                drag_rect = None
+                if drag_visible:
+                    drag_rect = pygame.Rect(mouse_pos[0] - SQUARE_SIZE // 2, mouse_pos[1] - SQUARE_SIZE // 2, SQUARE_SIZE, SQUARE_SIZE)
+                    dirty_rects.append(drag_rect)
+                if last_drag_rect:
+                    dirty_rects.append(last_drag_rect)
+                last_drag_rect = drag_rect
+                
+                # Buttons dirty their area when their hover or active state changes
+                dirty_rects.extend(chess_buttons[i].rect for i in changed_buttons)
+                
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
+            else:
+                chess_board.take_dirty_rects()
+                last_drag_rect = None
+                pygame.display.flip()
+            button_states = states
+        last_view = view
         
-        # Cap the frame rate
-        clock.tick(FPS)
+        if redraw:
+            # Cap the frame rate
+            clock.tick(FPS)
+        else:
+            # Nothing to draw: sleep until the next event or the next frame is due,
+            # whichever comes first
+            pending_events = _wait_for_event(1000 // FPS)
+            clock.tick()
     
     # Save inventory before quitting
     player_inventory.save_inventory()
@@ -475,6 +506,29 @@ def handle_interaction(interaction_result: Any, player: Player, dungeon: Dungeon
     
     return new_game_mode, new_current_enemy
 
+def _wait_for_event(timeout: int) -> List[pygame.event.Event]:
+    """
+    Sleep until an event arrives or timeout milliseconds pass.
+    
+    Returns the event taken off the queue while waiting, if any. It came
+    before anything still queued, so the caller must handle it first rather
+    than posting it back to the end of the queue.
+    """
+    if pygame.event.peek():
+        return []
+    event = pygame.event.wait(timeout)
+    return [] if event.type == pygame.NOEVENT else [event]
+
+def _mode_button_index(board: ChessBoard) -> int:
+    """Return the index of the mode button matching the board's game mode and AI difficulty."""
+    if board.game_mode == MODE_HUMAN_VS_HUMAN:
+        return 0
+    if board.ai_difficulty <= 5:
+        return 1
+    if board.ai_difficulty <= 10:
+        return 2
+    return 3
+
 def _handle_game_rewards(board: ChessBoard, inventory: PlayerInventory) -> None:
     """
     Handle rewards after a game is completed.
@@ -0,0 +1,289 @@
+import random
+from typing import List, Optional, Tuple
+
+from constants import BOARD_SIZE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
+
+# Squares are numbered row * 8 + col in board coordinates (row 0 is black's back
+# rank), so bit n of a bitboard stands for the square (n // 8, n % 8).
+
+COLOR_INDEX = {'white': 0, 'black': 1}
+OPPONENT = {'white': 'black', 'black': 'white'}
+PIECE_INDEX = {PAWN: 0, KNIGHT: 1, BISHOP: 2, ROOK: 3, QUEEN: 4, KING: 5}
+
+
+def piece_code(color: str, piece_type: str) -> int:
+    """Small-int code of a piece in Bitboards.codes (0 means an empty square)."""
+    return COLOR_INDEX[color] * 8 + PIECE_INDEX[piece_type] + 1
+
+
+KNIGHT_DELTAS = (
+    (-2, -1), (-2, 1), (-1, -2), (-1, 2),
+    (1, -2), (1, 2), (2, -1), (2, 1)
+)
+KING_DELTAS = (
+    (-1, -1), (-1, 0), (-1, 1),
+    (0, -1),           (0, 1),
+    (1, -1),  (1, 0),  (1, 1)
+)
+DIAGONAL_DIRECTIONS = ((-1, -1), (-1, 1), (1, -1), (1, 1))
+ORTHOGONAL_DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1))
+
+# Zobrist keys by piece code and square; fixed seed so keys are stable across runs
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST_KEYS = tuple(
+    tuple(_zobrist_rng.getrandbits(64) if code else 0 for _ in range(BOARD_SIZE * BOARD_SIZE))
+    for code in range(16)
+)
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+# Castling rights, in the order white kingside, white queenside, black kingside, black queenside
+ZOBRIST_CASTLING = tuple(_zobrist_rng.getrandbits(64) for _ in range(4))
+# En passant file
+ZOBRIST_EN_PASSANT = tuple(_zobrist_rng.getrandbits(64) for _ in range(BOARD_SIZE))
+
+# (row, col) of every square
+SQUARE_POSITIONS = tuple((sq // BOARD_SIZE, sq % BOARD_SIZE) for sq in range(BOARD_SIZE * BOARD_SIZE))
+
+
+def _on_board(row: int, col: int) -> bool:
+    return 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE
+
+
+def _leaper_attacks(deltas: Tuple[Tuple[int, int], ...]) -> Tuple[int, ...]:
+    """Attack bitboards of a piece that jumps by the given deltas, for every square."""
+    table = []
+    for row, col in SQUARE_POSITIONS:
+        bb = 0
+        for dr, dc in deltas:
+            if _on_board(row + dr, col + dc):
+                bb |= 1 << ((row + dr) * BOARD_SIZE + col + dc)
+        table.append(bb)
+    return tuple(table)
+
+
+def _ray_table(dr: int, dc: int) -> Tuple[int, ...]:
+    """Bitboards of the squares beyond each square in one direction, up to the edge."""
+    table = []
+    for row, col in SQUARE_POSITIONS:
+        bb = 0
+        r, c = row + dr, col + dc
+        while _on_board(r, c):
+            bb |= 1 << (r * BOARD_SIZE + c)
+            r, c = r + dr, c + dc
+        table.append(bb)
+    return tuple(table)
+
+
+KNIGHT_ATTACKS = _leaper_attacks(KNIGHT_DELTAS)
+KING_ATTACKS = _leaper_attacks(KING_DELTAS)
+
+# Squares attacked by a pawn on each square, by color index (white pawns move up)
+PAWN_ATTACKS = (
+    _leaper_attacks(((-1, -1), (-1, 1))),
+    _leaper_attacks(((1, -1), (1, 1)))
+)
+
+# Rays for each direction, with a flag telling whether the direction increases
+# the square index: the nearest blocker on the ray is then its lowest set bit,
+# otherwise its highest
+DIAGONAL_RAYS = tuple((_ray_table(dr, dc), dr * BOARD_SIZE + dc > 0) for dr, dc in DIAGONAL_DIRECTIONS)
+ORTHOGONAL_RAYS = tuple((_ray_table(dr, dc), dr * BOARD_SIZE + dc > 0) for dr, dc in ORTHOGONAL_DIRECTIONS)
+
+
+def sliding_attacks(sq: int, occupied: int, rays: Tuple[Tuple[Tuple[int, ...], bool], ...]) -> int:
+    """Squares reached from sq along the given rays, stopping at (and including) the first piece."""
+    attacks = 0
+    for ray_table, increasing in rays:
+        ray = ray_table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if increasing:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            # Drop everything behind the blocker
+            ray ^= ray_table[blocker]
+        attacks |= ray
+    return attacks
+
+
+def _blocker_masks(rays: Tuple[Tuple[Tuple[int, ...], bool], ...]) -> Tuple[int, ...]:
+    """Squares whose occupancy can change a slider's attacks: its rays minus the edge squares."""
+    masks = []
+    for sq in range(BOARD_SIZE * BOARD_SIZE):
+        mask = 0
+        for ray_table, increasing in rays:
+            ray = ray_table[sq]
+            if ray:
+                edge = 1 << (ray.bit_length() - 1) if increasing else ray & -ray
+                mask |= ray ^ edge
+        masks.append(mask)
+    return tuple(masks)
+
+
+def _attack_tables(masks: Tuple[int, ...], rays: Tuple[Tuple[Tuple[int, ...], bool], ...]) -> Tuple[dict, ...]:
+    """For every square, the attacks for every subset of its blocker mask."""
+    tables = []
+    for sq, mask in enumerate(masks):
+        table = {}
+        subset = 0
+        while True:
+            table[subset] = sliding_attacks(sq, subset, rays)
+            # Next subset of the mask (carry-rippler)
+            subset = (subset - mask) & mask
+            if not subset:
+                break
+        tables.append(table)
+    return tuple(tables)
+
+
+# Sliding attacks looked up by the relevant occupancy, like magic bitboards
+# but keyed on the masked occupancy directly since Python dicts hash ints
+BISHOP_MASKS = _blocker_masks(DIAGONAL_RAYS)
+ROOK_MASKS = _blocker_masks(ORTHOGONAL_RAYS)
+BISHOP_TABLES = _attack_tables(BISHOP_MASKS, DIAGONAL_RAYS)
+ROOK_TABLES = _attack_tables(ROOK_MASKS, ORTHOGONAL_RAYS)
+
+
+def bishop_attacks(sq: int, occupied: int) -> int:
+    return BISHOP_TABLES[sq][occupied & BISHOP_MASKS[sq]]
+
+
+def rook_attacks(sq: int, occupied: int) -> int:
+    return ROOK_TABLES[sq][occupied & ROOK_MASKS[sq]]
+
+
+def queen_attacks(sq: int, occupied: int) -> int:
+    return BISHOP_TABLES[sq][occupied & BISHOP_MASKS[sq]] | ROOK_TABLES[sq][occupied & ROOK_MASKS[sq]]
+
+
+def is_square_attacked(bitboards: 'Bitboards', sq: int, by_color: str) -> bool:
+    """Check if sq is attacked by any piece of by_color."""
+    color = COLOR_INDEX[by_color]
+    pieces = bitboards.pieces
+    # Offsets from base follow PIECE_INDEX
+    base = color * 6
+    
+    # A pawn of the other color on sq would attack exactly the squares an
+    # attacking pawn can stand on
+    if PAWN_ATTACKS[1 - color][sq] & pieces[base]:
+        return True
+    if KNIGHT_ATTACKS[sq] & pieces[base + 1]:
+        return True
+    if KING_ATTACKS[sq] & pieces[base + 5]:
+        return True
+    
+    # Sliding attackers: look from sq along the rays up to the first piece
+    queens = pieces[base + 4]
+    occupied = bitboards.occupied[0] | bitboards.occupied[1]
+    diagonal = pieces[base + 2] | queens
+    if diagonal and BISHOP_TABLES[sq][occupied & BISHOP_MASKS[sq]] & diagonal:
+        return True
+    orthogonal = pieces[base + 3] | queens
+    if orthogonal and ROOK_TABLES[sq][occupied & ROOK_MASKS[sq]] & orthogonal:
+        return True
+    
+    return False
+
+
+def bitboard_squares(bb: int) -> List[Tuple[int, int]]:
+    """Return the (row, col) of every set bit, lowest square first."""
+    squares = []
+    while bb:
+        lowest = bb & -bb
+        squares.append(SQUARE_POSITIONS[lowest.bit_length() - 1])
+        bb ^= lowest
+    return squares
+
+
+class Bitboards:
+    """
+    Piece and occupancy bitboards for one board, plus a flat array of piece
+    codes and a Zobrist hash of the piece placement.
+    """
+
+    __slots__ = ('pieces', 'occupied', 'codes', 'zobrist')
+
+    def __init__(self):
+        # Indexed by COLOR_INDEX * 6 + PIECE_INDEX
+        self.pieces = [0] * 12
+        # Indexed by COLOR_INDEX
+        self.occupied = [0, 0]
+        # piece_code() of the piece on each square, 0 if empty
+        self.codes = bytearray(BOARD_SIZE * BOARD_SIZE)
+        # XOR of ZOBRIST_KEYS[code][sq] over all pieces
+        self.zobrist = 0
+
+    def replace(self, sq: int, old: Optional['ChessPiece'], new: Optional['ChessPiece']) -> None:
+        """Record that the piece on sq changed from old to new."""
+        bit = 1 << sq
+        if old is not None:
+            color = COLOR_INDEX[old.color]
+            self.pieces[color * 6 + PIECE_INDEX[old.piece_type]] &= ~bit
+            self.occupied[color] &= ~bit
+            self.zobrist ^= ZOBRIST_KEYS[self.codes[sq]][sq]
+        if new is not None:
+            color = COLOR_INDEX[new.color]
+            piece = PIECE_INDEX[new.piece_type]
+            code = color * 8 + piece + 1
+            self.pieces[color * 6 + piece] |= bit
+            self.occupied[color] |= bit
+            self.codes[sq] = code
+            self.zobrist ^= ZOBRIST_KEYS[code][sq]
+        else:
+            self.codes[sq] = 0
+
+    def all_occupied(self) -> int:
+        return self.occupied[0] | self.occupied[1]
+
+
+class BoardRow(list):
+    """A row of the board grid that keeps the grid's bitboards in sync when assigned to."""
+
+    __slots__ = ('_bitboards', '_offset')
+
+    def __init__(self, cells, bitboards: Bitboards, row: int):
+        super().__init__(cells)
+        self._bitboards = bitboards
+        self._offset = row * BOARD_SIZE
+        for col, piece in enumerate(self):
+            if piece is not None:
+                bitboards.replace(self._offset + col, None, piece)
+
+    def __setitem__(self, col, piece) -> None:
+        if isinstance(col, slice):
+            old_cells = list(self)
+            super().__setitem__(col, piece)
+            for c, (old, new) in enumerate(zip(old_cells, self)):
+                if old is not new:
+                    self._bitboards.replace(self._offset + c, old, new)
+            return
+
+        if col < 0:
+            col += BOARD_SIZE
+        old = self[col]
+        super().__setitem__(col, piece)
+        self._bitboards.replace(self._offset + col, old, piece)
+
+
+class BoardGrid(list):
+    """
+    The 8x8 grid of pieces (board[row][col]) with bitboards mirroring it.
+
+    Reads are plain list reads; every assignment to a square or a row also
+    updates the bitboards, so code can keep writing to the grid directly.
+    """
+
+    __slots__ = ('bitboards',)
+
+    def __init__(self, rows=None):
+        self.bitboards = Bitboards()
+        if rows is None:
+            rows = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        super().__init__(BoardRow(cells, self.bitboards, row) for row, cells in enumerate(rows))
+
+    def __setitem__(self, row, cells) -> None:
+        if row < 0:
+            row += BOARD_SIZE
+        # Clear the bits of the row being replaced, then wrap the new one
+        self[row][:] = [None] * BOARD_SIZE
+        super().__setitem__(row, BoardRow(cells, self.bitboards, row))
@@ -1,6 +1,6 @@
 import pygame
 import time
-import numpy as np
+import random
 import math
 from typing import List, Tuple, Dict, Optional, Set
 
@@ -13,14 +13,21 @@ from constants import (
     MIN_AI_MOVE_TIME, MAX_AI_MOVE_TIME
 )
 from models.chess_piece import ChessPiece
+from models.bitboards import (
+    BoardGrid, COLOR_INDEX, PIECE_INDEX, OPPONENT, SQUARE_POSITIONS, piece_code, is_square_attacked,
+    ZOBRIST_BLACK_TO_MOVE, ZOBRIST_CASTLING, ZOBRIST_EN_PASSANT
+)
 from ui.animations import AnimatedPiece
 from chess_ai import ChessAI
 
+# King color, row and rook column for each castling right, in ZOBRIST_CASTLING order
+_CASTLING_CORNERS = (('white', 7, 7), ('white', 7, 0), ('black', 0, 7), ('black', 0, 0))
+
 class ChessBoard:
     """Represents the chess board and game state."""
     
     def __init__(self, game_mode: int = MODE_HUMAN_VS_HUMAN, ai_difficulty: int = 10):
-        self.board: List[List[Optional[ChessPiece]]] = [[None for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+        self.board = BoardGrid()
         self.selected_piece: Optional[ChessPiece] = None
         self.legal_moves: List[Tuple[int, int]] = []
         self.turn = 'white'
@@ -36,12 +43,65 @@ class ChessBoard:
         
         # Animation properties
         self.animated_pieces: List[AnimatedPiece] = []
+        # End squares (row * 8 + col) of the animated pieces, not drawn in place meanwhile
+        self.animating_squares: Set[int] = set()
         self.animating = False
         self.pending_ai_move = False
         self.ai_move_start_time = 0
         self.ai_move_duration = 0
         
+        # Cached piece moves, see ChessPiece.get_legal_moves
+        self.move_cache: Dict[tuple, Tuple[Tuple[int, int], ...]] = {}
+        
+        # Static board background and square highlight overlays, built on first draw
+        self._board_surface: Optional[pygame.Surface] = None
+        self._highlight_surfaces: Optional[Dict[str, pygame.Surface]] = None
+        
+        # Piece images by piece code, and the image dict they were taken from
+        self._code_images: List[Optional[pygame.Surface]] = []
+        self._code_images_source: Optional[Dict[str, pygame.Surface]] = None
+        
+        # UI panel fonts, loaded on first draw, and the text rendered with them
+        self._fonts: Optional[Dict[str, pygame.font.Font]] = None
+        self._text_cache: Dict[Tuple[str, str, tuple], pygame.Surface] = {}
+        
+        # Screen areas that changed since the last call to take_dirty_rects
+        self.dirty_rects: List[pygame.Rect] = []
+        self._drawn_state: Optional[tuple] = None
+        self._animation_rects: List[pygame.Rect] = []
+        
         self.setup_pieces()
+    
+    @property
+    def board(self) -> BoardGrid:
+        """The 8x8 grid of pieces, indexed as board[row][col]."""
+        return self._board
+    
+    @board.setter
+    def board(self, rows: List[List[Optional[ChessPiece]]]) -> None:
+        # Wrap plain lists so the bitboards follow direct writes to the grid
+        self._board = rows if isinstance(rows, BoardGrid) else BoardGrid(rows)
+    
+    @property
+    def zobrist(self) -> int:
+        """
+        Zobrist hash of the position: the piece placement hash the grid keeps up
+        to date on every write, plus side to move, castling rights and the
+        en passant file.
+        """
+        grid = self._board
+        key = grid.bitboards.zobrist
+        if self.turn == 'black':
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        for castling_key, (color, row, rook_col) in zip(ZOBRIST_CASTLING, _CASTLING_CORNERS):
+            king = grid[row][4]
+            rook = grid[row][rook_col]
+            if (king and king.piece_type == KING and king.color == color and not king.has_moved and
+                    rook and rook.piece_type == ROOK and rook.color == color and not rook.has_moved):
+                key ^= castling_key
+        if self.last_pawn_double_move is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.last_pawn_double_move[1]]
+        return key
         
     def setup_pieces(self) -> None:
         """Set up the initial position of all pieces on the board."""
@@ -67,20 +127,117 @@ class ChessBoard:
             (-border_width, -border_width, BOARD_PX + border_width * 2, BOARD_PX + border_width * 2)
         )
         
-        # Draw the board squares
+        # Draw the board squares and coordinates, rendered once and reused
+        if self._board_surface is None:
+            self._board_surface = self._build_board_surface()
+        screen.blit(self._board_surface, (0, 0))
+        
+        # Draw the square highlights in a single batched blit
+        if self._highlight_surfaces is None:
+            self._highlight_surfaces = self._build_highlight_surfaces()
+        highlights = self._highlight_surfaces
+        highlight_blits = []
+        
+        # Highlights for the last move
+        if self.move_history:
+            for row, col in self.move_history[-1]:
+                highlight_blits.append((highlights['last_move'], (col * SQUARE_SIZE, row * SQUARE_SIZE)))
+        
+        # Highlights for legal moves: a dot on empty squares, a filled square on captures
+        for row, col in self.legal_moves:
+            surface = highlights['move'] if self.board[row][col] is None else highlights['capture']
+            highlight_blits.append((surface, (col * SQUARE_SIZE, row * SQUARE_SIZE)))
+        
+        # Highlight for the selected piece
+        if self.selected_piece:
+            row, col = self.selected_piece.position
+            highlight_blits.append((highlights['selected'], (col * SQUARE_SIZE, row * SQUARE_SIZE)))
+        
+        screen.blits(highlight_blits, False)
+        
+        # Draw the pieces (except those being animated) in a single batched blit,
+        # reading the piece codes so no piece objects or image keys are touched
+        if self._code_images_source is not piece_images:
+            self._code_images = [None] * 16
+            for color in COLOR_INDEX:
+                for piece_type in PIECE_INDEX:
+                    self._code_images[piece_code(color, piece_type)] = piece_images[f'{color}_{piece_type}']
+            self._code_images_source = piece_images
+        code_images = self._code_images
+        animating_squares = self.animating_squares
+        
+        piece_blits = []
+        for sq, code in enumerate(self.board.bitboards.codes):
+            # Skip empty squares and pieces that are being animated
+            if code and sq not in animating_squares:
+                row, col = SQUARE_POSITIONS[sq]
+                piece_blits.append((code_images[code], (col * SQUARE_SIZE, row * SQUARE_SIZE), None, pygame.BLEND_PREMULTIPLIED))
+        screen.blits(piece_blits, False)
+        
+        # Draw animated pieces
+        for animated_piece in self.animated_pieces:
+            animated_piece.draw(screen)
+        
+        # Draw the UI panel
+        self.draw_ui(screen)
+        
+        self._collect_dirty_rects()
+    
+    def _frame_state(self) -> tuple:
+        """Everything drawn by draw() apart from animations and the thinking indicator."""
+        return (
+            self.board.bitboards.zobrist, self.selected_piece, tuple(self.legal_moves),
+            self.turn, self.game_mode, self.ai_difficulty, self.thinking, self.game_over,
+            len(self.move_history)
+        )
+    
+    def needs_redraw(self) -> bool:
+        """Check if the next frame would differ from the one drawn last."""
+        return (self.animating or self.thinking or bool(self._animation_rects) or
+                self._frame_state() != self._drawn_state)
+    
+    def _collect_dirty_rects(self) -> None:
+        """Record which parts of the screen changed in the frame just drawn."""
+        state = self._frame_state()
+        if state != self._drawn_state:
+            # The position, highlights or panel text changed: redraw everything
+            self._drawn_state = state
+            self.dirty_rects.append(pygame.Rect(0, 0, WINDOW_WIDTH, WINDOW_HEIGHT))
+        elif self.thinking:
+            # The thinking indicator pulses every frame
+            self.dirty_rects.append(pygame.Rect(BOARD_PX, 0, WINDOW_WIDTH - BOARD_PX, WINDOW_HEIGHT))
+        
+        # Animated pieces dirty both where they were last frame and where they are now
+        animation_rects = [
+            pygame.Rect(int(animated_piece.current_x), int(animated_piece.current_y), SQUARE_SIZE, SQUARE_SIZE)
+            for animated_piece in self.animated_pieces
+        ]
+        self.dirty_rects.extend(self._animation_rects)
+        self.dirty_rects.extend(animation_rects)
+        self._animation_rects = animation_rects
+    
+    def take_dirty_rects(self) -> List[pygame.Rect]:
+        """Return the changed screen areas and start collecting afresh."""
+        rects = self.dirty_rects
+        self.dirty_rects = []
+        return rects
+    
+    def _build_board_surface(self) -> pygame.Surface:
+        """Render the checkerboard with its coordinate labels onto a surface."""
+        surface = pygame.Surface((BOARD_PX, BOARD_PX)).convert()
+        coord_font = pygame.font.SysFont('Arial', 12)
+        
         for row in range(BOARD_SIZE):
             for col in range(BOARD_SIZE):
                 color = LIGHT_SQUARE if (row + col) % 2 == 0 else DARK_SQUARE
                 pygame.draw.rect(
-                    screen, 
+                    surface, 
                     color, 
                     (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
                 )
                 
                 # Draw coordinates on the edge squares
                 if row == BOARD_SIZE - 1 or col == 0:
-                    coord_font = pygame.font.SysFont('Arial', 12)
-                    
                     if row == BOARD_SIZE - 1:
                         # Draw column letters (a-h)
                         letter = chr(97 + col)  # ASCII 'a' starts at 97
@@ -89,70 +246,30 @@ class ChessBoard:
                             (col + 1) * SQUARE_SIZE - 3, 
                             (row + 1) * SQUARE_SIZE - 3
                         ))
-                        screen.blit(text, text_rect)
+                        surface.blit(text, text_rect)
                     
                     if col == 0:
                         # Draw row numbers (1-8)
                         number = str(BOARD_SIZE - row)
                         text = coord_font.render(number, True, DARK_SQUARE if (row + col) % 2 == 0 else LIGHT_SQUARE)
                         text_rect = text.get_rect(topleft=(3, row * SQUARE_SIZE + 3))
-                        screen.blit(text, text_rect)
-        
-        # Draw highlights for the last move
-        if self.move_history:
-            last_move = self.move_history[-1]
-            from_pos, to_pos = last_move
-            
-            for pos in [from_pos, to_pos]:
-                row, col = pos
-                last_move_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-                pygame.draw.rect(last_move_surface, LAST_MOVE, (0, 0, SQUARE_SIZE, SQUARE_SIZE))
-                screen.blit(last_move_surface, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-        
-        # Draw highlights for legal moves
-        for row, col in self.legal_moves:
-            highlight_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-            
-            # If the square is empty, draw a circle, otherwise draw a rectangle
-            if self.board[row][col] is None:
-                # Draw a circle for empty squares
-                pygame.draw.circle(
-                    highlight_surface, 
-                    HIGHLIGHT, 
-                    (SQUARE_SIZE // 2, SQUARE_SIZE // 2), 
-                    SQUARE_SIZE // 6
-                )
-            else:
-                # Draw a rectangle for captures
-                pygame.draw.rect(highlight_surface, HIGHLIGHT, (0, 0, SQUARE_SIZE, SQUARE_SIZE))
-            
-            screen.blit(highlight_surface, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-        
-        # Draw highlight for selected piece
-        if self.selected_piece:
-            row, col = self.selected_piece.position
-            selected_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-            pygame.draw.rect(selected_surface, SELECTED, (0, 0, SQUARE_SIZE, SQUARE_SIZE))
-            screen.blit(selected_surface, (col * SQUARE_SIZE, row * SQUARE_SIZE))
-        
-        # Draw the pieces (except those being animated)
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                piece = self.board[row][col]
-                if piece:
-                    # Skip drawing pieces that are being animated
-                    if self.animating and self._is_piece_animating(row, col):
-                        continue
-                    
-                    image = piece_images[piece.get_image_key()]
-                    screen.blit(image, (col * SQUARE_SIZE, row * SQUARE_SIZE))
+                        surface.blit(text, text_rect)
         
-        # Draw animated pieces
-        for animated_piece in self.animated_pieces:
-            animated_piece.draw(screen)
-        
-        # Draw the UI panel
-        self.draw_ui(screen)
+        return surface
+    
+    def _build_highlight_surfaces(self) -> Dict[str, pygame.Surface]:
+        """Create the translucent overlays drawn over highlighted squares."""
+        full_square = (0, 0, SQUARE_SIZE, SQUARE_SIZE)
+        surfaces = {}
+        for name, color in (('last_move', LAST_MOVE), ('capture', HIGHLIGHT), ('selected', SELECTED)):
+            surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+            pygame.draw.rect(surface, color, full_square)
+            surfaces[name] = surface.convert_alpha()
+        
+        move_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+        pygame.draw.circle(move_surface, HIGHLIGHT, (SQUARE_SIZE // 2, SQUARE_SIZE // 2), SQUARE_SIZE // 6)
+        surfaces['move'] = move_surface.convert_alpha()
+        return surfaces
     
     def _is_piece_animating(self, row: int, col: int) -> bool:
         """Check if a piece at the given position is currently being animated."""
@@ -161,14 +278,12 @@ class ChessBoard:
             return False
             
         # Check if this position is the end position of any animated piece
-        for animated_piece in self.animated_pieces:
-            end_col = int(animated_piece.end_x / SQUARE_SIZE)
-            end_row = int(animated_piece.end_y / SQUARE_SIZE)
-            
-            if row == end_row and col == end_col:
-                return True
-                
-        return False
+        return row * BOARD_SIZE + col in self.animating_squares
+    
+    def _add_animation(self, animated_piece: AnimatedPiece) -> None:
+        """Start animating a piece and hide it on its destination square until done."""
+        self.animated_pieces.append(animated_piece)
+        self.animating_squares.add(animated_piece.end_row * BOARD_SIZE + animated_piece.end_col)
     
     def update_animations(self) -> None:
         """Update all animated pieces and check if animations are complete."""
@@ -185,15 +300,39 @@ class ChessBoard:
         # If all animations are complete, clear the list and update the game state
         if all_completed:
             self.animated_pieces = []
+            self.animating_squares = set()
             self.animating = False
             
             # If there's a pending AI move, start the AI thinking process
             if self.pending_ai_move:
-                self.thinking = True
                 self.pending_ai_move = False
-                self.ai_move_start_time = time.time()
-                # Set a random thinking time between MIN and MAX
-                self.ai_move_duration = MIN_AI_MOVE_TIME + (MAX_AI_MOVE_TIME - MIN_AI_MOVE_TIME) * np.random.random()
+                self._start_ai_thinking()
+    
+    def _start_ai_thinking(self) -> None:
+        """Start the AI's thinking delay and let the engine search in the background meanwhile."""
+        self.thinking = True
+        self.ai_move_start_time = time.time()
+        # Set a random thinking time between MIN and MAX
+        self.ai_move_duration = MIN_AI_MOVE_TIME + (MAX_AI_MOVE_TIME - MIN_AI_MOVE_TIME) * random.random()
+        
+        if self.ai:
+            self.ai.update_board(self.move_history)
+            self.ai.start_thinking()
+    
+    def _render_text(self, font: str, text: str, color: tuple) -> pygame.Surface:
+        """Render text with one of the panel fonts, reusing earlier renders."""
+        key = (font, text, color)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            if self._fonts is None:
+                self._fonts = {
+                    'title': pygame.font.SysFont('Arial', 24, bold=True),
+                    'text': pygame.font.SysFont('Arial', 18),
+                    'game_over': pygame.font.SysFont('Arial', 22, bold=True),
+                }
+            surface = self._fonts[font].render(text, True, color)
+            self._text_cache[key] = surface
+        return surface
     
     def draw_ui(self, screen: pygame.Surface) -> None:
         """Draw a modern UI panel on the right side of the board."""
@@ -202,9 +341,7 @@ class ChessBoard:
         pygame.draw.rect(screen, UI_BG, (BOARD_PX, 0, WINDOW_WIDTH - BOARD_PX, WINDOW_HEIGHT))
         
         # Draw a title/header
-        title_font = pygame.font.SysFont('Arial', 24, bold=True)
-        title_text = "CHESSMANCER"
-        title_surface = title_font.render(title_text, True, UI_HEADING)
+        title_surface = self._render_text('title', "CHESSMANCER", UI_HEADING)
         title_rect = title_surface.get_rect(midtop=(BOARD_PX + (WINDOW_WIDTH - BOARD_PX) // 2, 20))
         screen.blit(title_surface, title_rect)
         
@@ -224,8 +361,7 @@ class ChessBoard:
         pygame.draw.rect(screen, UI_SECTION_BG, section_rect, border_radius=5)
         
         # Draw the current turn with an indicator
-        font = pygame.font.SysFont('Arial', 18)
-        turn_label = font.render("Current Turn:", True, UI_TEXT)
+        turn_label = self._render_text('text', "Current Turn:", UI_TEXT)
         screen.blit(turn_label, (BOARD_PX + 20, section_y + 15))
         
         # Draw a colored circle to indicate the turn
@@ -234,11 +370,11 @@ class ChessBoard:
         pygame.draw.circle(screen, UI_TEXT, (BOARD_PX + 30, section_y + 50), 10, 1)  # Border
         
         turn_text = f"{'White' if self.turn == 'white' else 'Black'}"
-        turn_surface = font.render(turn_text, True, UI_TEXT)
+        turn_surface = self._render_text('text', turn_text, UI_TEXT)
         screen.blit(turn_surface, (BOARD_PX + 50, section_y + 42))
         
         # Draw the game mode
-        mode_label = font.render("Game Mode:", True, UI_TEXT)
+        mode_label = self._render_text('text', "Game Mode:", UI_TEXT)
         screen.blit(mode_label, (BOARD_PX + 20, section_y + 70))
         
         mode_text = ""
@@ -248,14 +384,13 @@ class ChessBoard:
             difficulty_text = "Easy" if self.ai_difficulty <= 5 else "Medium" if self.ai_difficulty <= 10 else "Hard"
             mode_text = f"Human vs AI ({difficulty_text})"
         
-        mode_surface = font.render(mode_text, True, UI_TEXT)
+        mode_surface = self._render_text('text', mode_text, UI_TEXT)
         screen.blit(mode_surface, (BOARD_PX + 50, section_y + 95))
         
         # Draw AI thinking indicator
         if self.thinking:
             thinking_y = section_y + section_height + 20
-            thinking_text = "AI is thinking..."
-            thinking_surface = font.render(thinking_text, True, (255, 200, 0))
+            thinking_surface = self._render_text('text', "AI is thinking...", (255, 200, 0))
             
             # Create a pulsing effect
             alpha = int(128 + 127 * abs(math.sin(time.time() * 3)))
@@ -274,15 +409,13 @@ class ChessBoard:
             )
             pygame.draw.rect(screen, (80, 0, 0), game_over_section, border_radius=5)
             
-            game_over_font = pygame.font.SysFont('Arial', 22, bold=True)
-            game_over_text = "Game Over"
-            game_over_surface = game_over_font.render(game_over_text, True, (255, 100, 100))
+            game_over_surface = self._render_text('game_over', "Game Over", (255, 100, 100))
             game_over_rect = game_over_surface.get_rect(
                 midtop=(BOARD_PX + (WINDOW_WIDTH - BOARD_PX) // 2, game_over_y + 15)
             )
             screen.blit(game_over_surface, game_over_rect)
             
-            result_surface = font.render(self.game_result, True, (255, 200, 200))
+            result_surface = self._render_text('text', self.game_result, (255, 200, 200))
             result_rect = result_surface.get_rect(
                 midtop=(BOARD_PX + (WINDOW_WIDTH - BOARD_PX) // 2, game_over_y + 45)
             )
@@ -344,7 +477,7 @@ class ChessBoard:
                     (row, col),
                     piece_image
                 )
-                self.animated_pieces.append(animated_piece)
+                self._add_animation(animated_piece)
                 
                 # Create animation for the rook if castling
                 if is_castling:
@@ -359,7 +492,7 @@ class ChessBoard:
                                 (row, col - 1),
                                 rook_image
                             )
-                            self.animated_pieces.append(rook_animation)
+                            self._add_animation(rook_animation)
                     else:  # Queenside castling
                         rook = self.board[row][0]
                         if rook:
@@ -371,7 +504,7 @@ class ChessBoard:
                                 (row, col + 1),
                                 rook_image
                             )
-                            self.animated_pieces.append(rook_animation)
+                            self._add_animation(rook_animation)
             
             # Update the board
             self.board[row][col] = self.selected_piece
@@ -434,10 +567,7 @@ class ChessBoard:
                     self.pending_ai_move = True
                 else:
                     # Otherwise, start AI thinking immediately
-                    self.thinking = True
-                    self.ai_move_start_time = time.time()
-                    # Set a random thinking time between MIN and MAX
-                    self.ai_move_duration = MIN_AI_MOVE_TIME + (MAX_AI_MOVE_TIME - MIN_AI_MOVE_TIME) * np.random.random()
+                    self._start_ai_thinking()
             
             return True
         
@@ -476,7 +606,7 @@ class ChessBoard:
                             (to_row, to_col),
                             piece_image
                         )
-                        self.animated_pieces.append(animated_piece)
+                        self._add_animation(animated_piece)
                     
                     # Update the board
                     self.board[to_row][to_col] = piece
@@ -506,11 +636,12 @@ class ChessBoard:
         if ai_difficulty is not None:
             self.ai_difficulty = ai_difficulty
         
-        # Recreate AI if needed
+        # Reuse the running AI engine for the new game, or start one if needed
         if self.game_mode == MODE_HUMAN_VS_AI:
             if self.ai:
-                self.ai.close()
-            self.ai = ChessAI(difficulty=self.ai_difficulty)
+                self.ai.new_game(difficulty=self.ai_difficulty)
+            else:
+                self.ai = ChessAI(difficulty=self.ai_difficulty)
         elif self.ai:
             self.ai.close()
             self.ai = None
@@ -530,6 +661,7 @@ class ChessBoard:
         
         # Reset animation properties
         self.animated_pieces = []
+        self.animating_squares = set()
         self.animating = False
         self.pending_ai_move = False
         self.ai_move_start_time = 0
@@ -537,85 +669,15 @@ class ChessBoard:
     
     def find_king(self, color: str) -> Optional[Tuple[int, int]]:
         """Find the position of the king of the specified color."""
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                piece = self.board[row][col]
-                if piece and piece.piece_type == KING and piece.color == color:
-                    return (row, col)
-        return None
+        # The king bitboard always knows where the king is; take its lowest square
+        kings = self.board.bitboards.pieces[COLOR_INDEX[color] * 6 + PIECE_INDEX[KING]]
+        if not kings:
+            return None
+        return SQUARE_POSITIONS[(kings & -kings).bit_length() - 1]
     
     def is_square_attacked(self, row: int, col: int, by_color: str) -> bool:
         """Check if a square is attacked by any piece of the specified color."""
-        # Check for attacks from pawns
-        pawn_direction = 1 if by_color == 'black' else -1
-        for dc in [-1, 1]:
-            attack_row = row + pawn_direction
-            attack_col = col + dc
-            if 0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE:
-                piece = self.board[attack_row][attack_col]
-                if piece and piece.piece_type == PAWN and piece.color == by_color:
-                    return True
-        
-        # Check for attacks from knights
-        knight_moves = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        for dr, dc in knight_moves:
-            attack_row, attack_col = row + dr, col + dc
-            if 0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE:
-                piece = self.board[attack_row][attack_col]
-                if piece and piece.piece_type == KNIGHT and piece.color == by_color:
-                    return True
-        
-        # Check for attacks from kings (for adjacent squares)
-        king_moves = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1),           (0, 1),
-            (1, -1),  (1, 0),  (1, 1)
-        ]
-        for dr, dc in king_moves:
-            attack_row, attack_col = row + dr, col + dc
-            if 0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE:
-                piece = self.board[attack_row][attack_col]
-                if piece and piece.piece_type == KING and piece.color == by_color:
-                    return True
-        
-        # Check diagonal attacks (bishop, queen)
-        diagonals = [(-1, -1), (-1, 1), (1, -1), (1, 1)]
-        for dr, dc in diagonals:
-            for i in range(1, BOARD_SIZE):
-                attack_row, attack_col = row + i * dr, col + i * dc
-                
-                if not (0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE):
-                    break
-                
-                piece = self.board[attack_row][attack_col]
-                if piece:
-                    if piece.color == by_color and (piece.piece_type == BISHOP or piece.piece_type == QUEEN):
-                        # Verify it's a valid diagonal attack
-                        if abs(row - attack_row) == abs(col - attack_col):
-                            return True
-                    break  # Stop if we hit any piece
-        
-        # Check orthogonal attacks (rook, queen)
-        orthogonals = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-        for dr, dc in orthogonals:
-            for i in range(1, BOARD_SIZE):
-                attack_row, attack_col = row + i * dr, col + i * dc
-                
-                if not (0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE):
-                    break
-                
-                piece = self.board[attack_row][attack_col]
-                if piece:
-                    if piece.color == by_color and (piece.piece_type == ROOK or piece.piece_type == QUEEN):
-                        # Verify it's a valid orthogonal attack
-                        if row == attack_row or col == attack_col:
-                            return True
-                    break  # Stop if we hit any piece
-        
-        return False
+        return is_square_attacked(self.board.bitboards, row * BOARD_SIZE + col, by_color)
     
     def is_king_in_check(self, color: str) -> bool:
         """Check if the king of the specified color is in check."""
@@ -624,18 +686,20 @@ class ChessBoard:
             return False
         
         row, col = king_pos
-        opponent_color = 'black' if color == 'white' else 'white'
-        return self.is_square_attacked(row, col, opponent_color)
+        return self.is_square_attacked(row, col, OPPONENT[color])
     
     def would_move_cause_check(self, piece: ChessPiece, to_row: int, to_col: int) -> bool:
         """Check if moving a piece to a position would cause the king to be in check."""
         # Save the current state
         from_row, from_col = piece.position
-        captured_piece = self.board[to_row][to_col]
+        grid = self.board
+        from_cells = grid[from_row]
+        to_cells = grid[to_row]
+        captured_piece = to_cells[to_col]
         
         # Make the move temporarily
-        self.board[from_row][from_col] = None
-        self.board[to_row][to_col] = piece
+        from_cells[from_col] = None
+        to_cells[to_col] = piece
         piece.position = (to_row, to_col)
         
         # Check if the king is in check
@@ -643,8 +707,8 @@ class ChessBoard:
         
         # Restore the board state
         piece.position = (from_row, from_col)
-        self.board[from_row][from_col] = piece
-        self.board[to_row][to_col] = captured_piece
+        from_cells[from_col] = piece
+        to_cells[to_col] = captured_piece
         
         return king_in_check
     
@@ -663,17 +727,16 @@ class ChessBoard:
         if not self.is_king_in_check(color):
             return False
         
-        # Check if any piece can make a move that gets the king out of check
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                piece = self.board[row][col]
-                if piece and piece.color == color:
-                    # Get all potential legal moves
-                    potential_moves = piece.get_legal_moves(self)
-                    # Filter out moves that would leave the king in check
-                    legal_moves = self.filter_legal_moves_for_check(piece, potential_moves)
-                    if legal_moves:
-                        return False
+        # Check if any piece can make a move that gets the king out of check.
+        # Collect the pieces first, since trying moves writes to the grid.
+        pieces = [piece for cells in self.board for piece in cells if piece and piece.color == color]
+        for piece in pieces:
+            # Get all potential legal moves
+            potential_moves = piece.get_legal_moves(self)
+            # Filter out moves that would leave the king in check
+            legal_moves = self.filter_legal_moves_for_check(piece, potential_moves)
+            if legal_moves:
+                return False
         
         # If no piece can make a legal move, it's checkmate
         return True
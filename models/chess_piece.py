@@ -3,46 +3,123 @@ from typing import List, Tuple, Optional, Dict, Any
 from constants import (
     BOARD_SIZE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING
 )
+from models.bitboards import (
+    COLOR_INDEX, OPPONENT, SQUARE_POSITIONS, KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS,
+    DIAGONAL_RAYS, ORTHOGONAL_RAYS, bishop_attacks, rook_attacks, queen_attacks,
+    bitboard_squares, is_square_attacked
+)
+
+# Maximum number of entries kept in a board's move cache before it is cleared
+MOVE_CACHE_SIZE = 1 << 14
+
+def _full_rays(rays) -> Tuple[int, ...]:
+    return tuple(
+        sum(ray_table[sq] for ray_table, _ in rays) for sq in range(BOARD_SIZE * BOARD_SIZE)
+    )
+
+def _pawn_move_masks(color: str) -> Tuple[int, ...]:
+    direction = -1 if color == 'white' else 1
+    masks = []
+    for sq, (row, col) in enumerate(SQUARE_POSITIONS):
+        mask = PAWN_ATTACKS[COLOR_INDEX[color]][sq]
+        for step in (1, 2):
+            if 0 <= row + direction * step < BOARD_SIZE:
+                mask |= 1 << ((row + direction * step) * BOARD_SIZE + col)
+        masks.append(mask)
+    return tuple(masks)
+
+# Squares whose contents can change the moves of a (non-king) piece on each
+# square. The move cache keys on what stands there, so a cached move list
+# stays valid until a piece lands on or leaves one of those squares.
+_DIAGONAL_MASKS = _full_rays(DIAGONAL_RAYS)
+_ORTHOGONAL_MASKS = _full_rays(ORTHOGONAL_RAYS)
+_MOVE_MASKS = {}
+for _color in COLOR_INDEX:
+    _MOVE_MASKS[f'{_color}_{PAWN}'] = _pawn_move_masks(_color)
+    _MOVE_MASKS[f'{_color}_{KNIGHT}'] = KNIGHT_ATTACKS
+    _MOVE_MASKS[f'{_color}_{BISHOP}'] = _DIAGONAL_MASKS
+    _MOVE_MASKS[f'{_color}_{ROOK}'] = _ORTHOGONAL_MASKS
+    _MOVE_MASKS[f'{_color}_{QUEEN}'] = tuple(d | o for d, o in zip(_DIAGONAL_MASKS, _ORTHOGONAL_MASKS))
 
 class ChessPiece:
     """Represents a chess piece with its type, color, and position."""
     
+    __slots__ = ('piece_type', 'color', 'position', 'has_moved', 'image_key')
+    
     def __init__(self, piece_type: str, color: str, position: Tuple[int, int]):
         self.piece_type = piece_type
         self.color = color
         self.position = position
         self.has_moved = False
+        # Type and color never change, so the image key is built once
+        self.image_key = f'{color}_{piece_type}'
         
     def get_image_key(self) -> str:
         """Return the key to look up the piece's image."""
-        return f'{self.color}_{self.piece_type}'
+        return self.image_key
     
     def get_legal_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
-        """Return a list of legal moves for this piece."""
+        """
+        Return a list of legal moves for this piece.
+        
+        Results are cached on the board. Pieces other than the king are keyed
+        on the pieces standing on the squares that can affect their moves, so
+        a cached list survives moves elsewhere on the board. Castling depends
+        on attacks from anywhere, so kings are keyed on the Zobrist hash of
+        the whole placement.
+        """
         row, col = self.position
-        moves = []
+        grid = board.board
+        bitboards = grid.bitboards
+        if self.piece_type == KING:
+            # Castling depends on whether the king and the corner rooks have moved
+            corners = grid[row]
+            key = (bitboards.zobrist, self.image_key, self.position, self.has_moved,
+                   corners[0] is not None and corners[0].has_moved,
+                   corners[7] is not None and corners[7].has_moved)
+        else:
+            sq = row * BOARD_SIZE + col
+            mask = _MOVE_MASKS[self.image_key][sq]
+            white, black = bitboards.occupied
+            key = (self.image_key, sq, white & mask, black & mask)
+            if self.piece_type == PAWN:
+                key += (board.last_pawn_double_move,)
+        
+        cache = board.move_cache
+        moves = cache.get(key)
+        if moves is None:
+            if len(cache) >= MOVE_CACHE_SIZE:
+                cache.clear()
+            moves = tuple(self._generate_moves(board))
+            cache[key] = moves
+        return list(moves)
+    
+    def _generate_moves(self, board: 'ChessBoard') -> List[Tuple[int, int]]:
+        """Generate the legal moves for this piece from the board's bitboards."""
+        row, col = self.position
+        sq = row * BOARD_SIZE + col
+        bitboards = board.board.bitboards
+        color = COLOR_INDEX[self.color]
+        own = bitboards.occupied[color]
+        occupied = own | bitboards.occupied[1 - color]
         
         if self.piece_type == PAWN:
             direction = -1 if self.color == 'white' else 1
+            moves = []
             
             # Move forward one square
             if 0 <= row + direction < BOARD_SIZE:
-                if board.board[row + direction][col] is None:
+                if not occupied >> (sq + direction * BOARD_SIZE) & 1:
                     moves.append((row + direction, col))
                     
                     # Move forward two squares from starting position
                     if ((self.color == 'white' and row == 6) or 
                         (self.color == 'black' and row == 1)):
-                        if (0 <= row + 2 * direction < BOARD_SIZE and 
-                            board.board[row + 2 * direction][col] is None):
+                        if not occupied >> (sq + 2 * direction * BOARD_SIZE) & 1:
                             moves.append((row + 2 * direction, col))
             
             # Capture diagonally
-            for dc in [-1, 1]:
-                if 0 <= row + direction < BOARD_SIZE and 0 <= col + dc < BOARD_SIZE:
-                    target = board.board[row + direction][col + dc]
-                    if target is not None and target.color != self.color:
-                        moves.append((row + direction, col + dc))
+            moves.extend(bitboard_squares(PAWN_ATTACKS[color][sq] & bitboards.occupied[1 - color]))
             
             # En passant capture
             if board.last_pawn_double_move is not None:
@@ -52,70 +129,36 @@ class ChessPiece:
                 if (abs(col - en_passant_col) == 1 and row == en_passant_row):
                     # The en passant capture moves the pawn diagonally behind the enemy pawn
                     moves.append((row + direction, en_passant_col))
-        
-        elif self.piece_type == KNIGHT:
-            knight_moves = [
-                (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-                (1, -2), (1, 2), (2, -1), (2, 1)
-            ]
-            
-            for dr, dc in knight_moves:
-                new_row, new_col = row + dr, col + dc
-                if 0 <= new_row < BOARD_SIZE and 0 <= new_col < BOARD_SIZE:
-                    target = board.board[new_row][new_col]
-                    if target is None or target.color != self.color:
-                        moves.append((new_row, new_col))
-        
-        elif self.piece_type in [BISHOP, ROOK, QUEEN]:
-            directions = []
-            
-            if self.piece_type in [BISHOP, QUEEN]:
-                directions.extend([(-1, -1), (-1, 1), (1, -1), (1, 1)])  # Diagonals
-                
-            if self.piece_type in [ROOK, QUEEN]:
-                directions.extend([(-1, 0), (1, 0), (0, -1), (0, 1)])  # Horizontals and verticals
             
-            for dr, dc in directions:
-                for i in range(1, BOARD_SIZE):
-                    new_row, new_col = row + i * dr, col + i * dc
-                    
-                    if not (0 <= new_row < BOARD_SIZE and 0 <= new_col < BOARD_SIZE):
-                        break
-                    
-                    target = board.board[new_row][new_col]
-                    if target is None:
-                        moves.append((new_row, new_col))
-                    elif target.color != self.color:
-                        moves.append((new_row, new_col))
-                        break
-                    else:
-                        break
-        
+            return moves
+        
+        if self.piece_type == KNIGHT:
+            targets = KNIGHT_ATTACKS[sq]
+        elif self.piece_type == BISHOP:
+            targets = bishop_attacks(sq, occupied)
+        elif self.piece_type == ROOK:
+            targets = rook_attacks(sq, occupied)
+        elif self.piece_type == QUEEN:
+            targets = queen_attacks(sq, occupied)
         elif self.piece_type == KING:
-            king_moves = [
-                (-1, -1), (-1, 0), (-1, 1),
-                (0, -1),           (0, 1),
-                (1, -1),  (1, 0),  (1, 1)
-            ]
+            targets = KING_ATTACKS[sq]
+        else:
+            return []
+        
+        # Any reachable square not holding one of our own pieces
+        moves = bitboard_squares(targets & ~own)
+        
+        # Check for castling
+        if self.piece_type == KING and not self.has_moved:
+            # Kingside castling (O-O)
+            if self._can_castle_kingside(board):
+                # Add the castling move (king moves two squares to the right)
+                moves.append((row, col + 2))
             
-            for dr, dc in king_moves:
-                new_row, new_col = row + dr, col + dc
-                if 0 <= new_row < BOARD_SIZE and 0 <= new_col < BOARD_SIZE:
-                    target = board.board[new_row][new_col]
-                    if target is None or target.color != self.color:
-                        moves.append((new_row, new_col))
-            
-            # Check for castling
-            if not self.has_moved:
-                # Kingside castling (O-O)
-                if self._can_castle_kingside(board):
-                    # Add the castling move (king moves two squares to the right)
-                    moves.append((row, col + 2))
-                
-                # Queenside castling (O-O-O)
-                if self._can_castle_queenside(board):
-                    # Add the castling move (king moves two squares to the left)
-                    moves.append((row, col - 2))
+            # Queenside castling (O-O-O)
+            if self._can_castle_queenside(board):
+                # Add the castling move (king moves two squares to the left)
+                moves.append((row, col - 2))
         
         return moves
     
@@ -125,13 +168,14 @@ class ChessPiece:
         
         # Check if the rook is in the correct position and hasn't moved
         rook_col = 7
-        rook = board.board[row][rook_col]
+        cells = board.board[row]
+        rook = cells[rook_col]
         if not rook or rook.piece_type != ROOK or rook.has_moved:
             return False
         
         # Check if squares between king and rook are empty
         for c in range(col + 1, rook_col):
-            if board.board[row][c] is not None:
+            if cells[c] is not None:
                 return False
         
         # Check if king is in check
@@ -151,13 +195,14 @@ class ChessPiece:
         
         # Check if the rook is in the correct position and hasn't moved
         rook_col = 0
-        rook = board.board[row][rook_col]
+        cells = board.board[row]
+        rook = cells[rook_col]
         if not rook or rook.piece_type != ROOK or rook.has_moved:
             return False
         
         # Check if squares between king and rook are empty
         for c in range(rook_col + 1, col):
-            if board.board[row][c] is not None:
+            if cells[c] is not None:
                 return False
         
         # Check if king is in check
@@ -173,85 +218,7 @@ class ChessPiece:
     
     def _is_square_attacked(self, board: 'ChessBoard', row: int, col: int) -> bool:
         """Check if a square is attacked by any opponent's piece."""
-        opponent_color = 'black' if self.color == 'white' else 'white'
-        
-        # Check for attacks from pawns
-        pawn_direction = 1 if opponent_color == 'black' else -1
-        for dc in [-1, 1]:
-            attack_row = row + pawn_direction
-            attack_col = col + dc
-            if 0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE:
-                piece = board.board[attack_row][attack_col]
-                if piece and piece.piece_type == PAWN and piece.color == opponent_color:
-                    return True
-        
-        # Check for attacks from knights
-        knight_moves = [
-            (-2, -1), (-2, 1), (-1, -2), (-1, 2),
-            (1, -2), (1, 2), (2, -1), (2, 1)
-        ]
-        for dr, dc in knight_moves:
-            attack_row, attack_col = row + dr, col + dc
-            if 0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE:
-                piece = board.board[attack_row][attack_col]
-                if piece and piece.piece_type == KNIGHT and piece.color == opponent_color:
-                    return True
-        
-        # Check for attacks from kings (for adjacent squares)
-        king_moves = [
-            (-1, -1), (-1, 0), (-1, 1),
-            (0, -1),           (0, 1),
-            (1, -1),  (1, 0),  (1, 1)
-        ]
-        for dr, dc in king_moves:
-            attack_row, attack_col = row + dr, col + dc
-            if 0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE:
-                piece = board.board[attack_row][attack_col]
-                if piece and piece.piece_type == KING and piece.color == opponent_color:
-                    return True
-        
-        # Check for attacks from sliding pieces (bishop, rook, queen)
-        # Directions for all sliding pieces
-        directions = []
-        
-        # Bishop and Queen directions (diagonals)
-        directions.extend([(-1, -1), (-1, 1), (1, -1), (1, 1)])
-        
-        # Rook and Queen directions (horizontals and verticals)
-        directions.extend([(-1, 0), (1, 0), (0, -1), (0, 1)])
-        
-        for dr, dc in directions:
-            for i in range(1, BOARD_SIZE):
-                attack_row, attack_col = row + i * dr, col + i * dc
-                
-                if not (0 <= attack_row < BOARD_SIZE and 0 <= attack_col < BOARD_SIZE):
-                    break
-                
-                piece = board.board[attack_row][attack_col]
-                if piece:
-                    if piece.color == opponent_color:
-                        # Check if this piece can attack in this direction
-                        can_attack = False
-                        
-                        # Bishops attack diagonally
-                        if piece.piece_type == BISHOP and abs(dr) == abs(dc):
-                            can_attack = True
-                        
-                        # Rooks attack horizontally and vertically
-                        elif piece.piece_type == ROOK and (dr == 0 or dc == 0):
-                            can_attack = True
-                        
-                        # Queens attack in all directions
-                        elif piece.piece_type == QUEEN:
-                            can_attack = True
-                        
-                        if can_attack:
-                            return True
-                    
-                    # If we hit any piece (even our own), we can't be attacked from beyond it
-                    break
-        
-        return False
+        return is_square_attacked(board.board.bitboards, row * BOARD_SIZE + col, OPPONENT[self.color])
 
 # RPG Extensions for Chess Pieces
 class RPGChessPiece(ChessPiece):
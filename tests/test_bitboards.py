@@ -0,0 +1,192 @@
+import unittest
+from unittest import mock
+import random
+import chess
+from models.bitboards import (
+    BoardGrid, COLOR_INDEX, PIECE_INDEX, KNIGHT_ATTACKS, bishop_attacks, rook_attacks,
+    bitboard_squares, piece_code, is_square_attacked, sliding_attacks, DIAGONAL_RAYS, ORTHOGONAL_RAYS
+)
+from models.chess_board import ChessBoard
+from models.chess_piece import ChessPiece
+from constants import PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, MODE_HUMAN_VS_HUMAN
+
+
+def square_bit(row, col):
+    return 1 << (row * 8 + col)
+
+
+class TestBitboards(unittest.TestCase):
+    """Test cases for the bitboard mirror of the board grid."""
+
+    def assert_in_sync(self, grid):
+        """Check the bitboards against a rebuild from the grid contents."""
+        expected = BoardGrid([list(row) for row in grid]).bitboards
+        self.assertEqual(grid.bitboards.pieces, expected.pieces)
+        self.assertEqual(grid.bitboards.occupied, expected.occupied)
+        self.assertEqual(grid.bitboards.codes, expected.codes)
+        self.assertEqual(grid.bitboards.zobrist, expected.zobrist)
+
+    def test_grid_tracks_direct_writes(self):
+        """Test that square, row and slice assignments update the bitboards."""
+        grid = BoardGrid()
+        knight = ChessPiece(KNIGHT, 'black', (0, 1))
+        grid[0][1] = knight
+        self.assertEqual(grid.bitboards.pieces[COLOR_INDEX['black'] * 6 + PIECE_INDEX[KNIGHT]], square_bit(0, 1))
+        self.assertEqual(grid.bitboards.codes[1], piece_code('black', KNIGHT))
+
+        # Moving a piece clears its old square
+        grid[2][2] = knight
+        grid[0][1] = None
+        self.assertEqual(grid.bitboards.occupied[COLOR_INDEX['black']], square_bit(2, 2))
+
+        # Replacing a row and assigning a slice
+        grid[2] = [ChessPiece(PAWN, 'white', (2, col)) for col in range(8)]
+        grid[2][-1] = None
+        grid[7][2:4] = [ChessPiece(QUEEN, 'white', (7, 2)), ChessPiece(KING, 'white', (7, 3))]
+        self.assert_in_sync(grid)
+        self.assertEqual(grid.bitboards.occupied[COLOR_INDEX['black']], 0)
+
+    def test_board_setter_wraps_lists(self):
+        """Test that assigning a plain nested list to ChessBoard.board keeps bitboards working."""
+        board = ChessBoard(game_mode=MODE_HUMAN_VS_HUMAN)
+        board.board = [[None for _ in range(8)] for _ in range(8)]
+        self.assertIsInstance(board.board, BoardGrid)
+        self.assertEqual(board.board.bitboards.all_occupied(), 0)
+
+        board.board[7][4] = ChessPiece(KING, 'white', (7, 4))
+        self.assertEqual(board.board.bitboards.all_occupied(), square_bit(7, 4))
+
+    def test_attack_tables(self):
+        """Test the precomputed knight table and blocked sliding attacks."""
+        self.assertEqual(sorted(bitboard_squares(KNIGHT_ATTACKS[0])), [(1, 2), (2, 1)])
+
+        # Rook on a1 blocked on a4 and c1
+        occupied = square_bit(4, 0) | square_bit(7, 2)
+        self.assertEqual(sorted(bitboard_squares(rook_attacks(7 * 8 + 0, occupied))),
+                         [(4, 0), (5, 0), (6, 0), (7, 1), (7, 2)])
+
+        # Bishop on d4 blocked on f6
+        occupied = square_bit(2, 5)
+        self.assertIn((2, 5), bitboard_squares(bishop_attacks(4 * 8 + 3, occupied)))
+        self.assertNotIn((1, 6), bitboard_squares(bishop_attacks(4 * 8 + 3, occupied)))
+
+    def test_attack_tables_match_rays(self):
+        """Test the occupancy-indexed slider tables against a direct ray walk."""
+        rng = random.Random(99)
+        for _ in range(200):
+            occupied = rng.getrandbits(64) & rng.getrandbits(64)
+            for sq in range(64):
+                self.assertEqual(bishop_attacks(sq, occupied), sliding_attacks(sq, occupied, DIAGONAL_RAYS))
+                self.assertEqual(rook_attacks(sq, occupied), sliding_attacks(sq, occupied, ORTHOGONAL_RAYS))
+
+    def test_moves_match_ray_scan(self):
+        """Test that bitboard move generation matches a square-by-square ray scan."""
+        directions = {
+            KNIGHT: [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)],
+            BISHOP: [(-1, -1), (-1, 1), (1, -1), (1, 1)],
+            ROOK: [(-1, 0), (1, 0), (0, -1), (0, 1)],
+        }
+        directions[QUEEN] = directions[BISHOP] + directions[ROOK]
+        sliders = (BISHOP, ROOK, QUEEN)
+
+        rng = random.Random(1234)
+        board = ChessBoard(game_mode=MODE_HUMAN_VS_HUMAN)
+        for _ in range(50):
+            board.clear_board()
+            squares = rng.sample(range(64), 16)
+            for sq in squares:
+                piece_type = rng.choice([PAWN, KNIGHT, BISHOP, ROOK, QUEEN])
+                color = rng.choice(['white', 'black'])
+                board.board[sq // 8][sq % 8] = ChessPiece(piece_type, color, (sq // 8, sq % 8))
+
+            for sq in squares:
+                piece = board.board[sq // 8][sq % 8]
+                if piece.piece_type == PAWN:
+                    continue
+                row, col = piece.position
+                expected = set()
+                for dr, dc in directions[piece.piece_type]:
+                    r, c = row + dr, col + dc
+                    while 0 <= r < 8 and 0 <= c < 8:
+                        target = board.board[r][c]
+                        if target is None or target.color != piece.color:
+                            expected.add((r, c))
+                        if target is not None or piece.piece_type not in sliders:
+                            break
+                        r, c = r + dr, c + dc
+                self.assertEqual(set(piece.get_legal_moves(board)), expected)
+
+    def test_square_attacked_matches_python_chess(self):
+        """Test attack detection against python-chess on random positions."""
+        symbols = {PAWN: 'p', KNIGHT: 'n', BISHOP: 'b', ROOK: 'r', QUEEN: 'q', KING: 'k'}
+        rng = random.Random(4321)
+        for _ in range(50):
+            grid = BoardGrid()
+            reference = chess.Board(None)
+            for sq in rng.sample(range(64), 12):
+                piece_type = rng.choice(list(symbols))
+                color = rng.choice(['white', 'black'])
+                grid[sq // 8][sq % 8] = ChessPiece(piece_type, color, (sq // 8, sq % 8))
+                symbol = symbols[piece_type].upper() if color == 'white' else symbols[piece_type]
+                reference.set_piece_at((7 - sq // 8) * 8 + sq % 8, chess.Piece.from_symbol(symbol))
+
+            for sq in range(64):
+                for color, chess_color in (('white', chess.WHITE), ('black', chess.BLACK)):
+                    expected = reference.is_attacked_by(chess_color, (7 - sq // 8) * 8 + sq % 8)
+                    self.assertEqual(is_square_attacked(grid.bitboards, sq, color), expected)
+
+    def test_zobrist_follows_placement(self):
+        """Test that the placement hash returns to its old value when a move is undone."""
+        board = ChessBoard(game_mode=MODE_HUMAN_VS_HUMAN)
+        start = board.board.bitboards.zobrist
+        knight = board.board[7][6]
+        board.board[5][5] = knight
+        board.board[7][6] = None
+        self.assertNotEqual(board.board.bitboards.zobrist, start)
+        board.board[7][6] = knight
+        board.board[5][5] = None
+        self.assertEqual(board.board.bitboards.zobrist, start)
+
+    def test_position_hash(self):
+        """Test that the position hash depends on the position, not the move order."""
+        first = ChessBoard(game_mode=MODE_HUMAN_VS_HUMAN)
+        second = ChessBoard(game_mode=MODE_HUMAN_VS_HUMAN)
+        start = first.zobrist
+        for board, moves in ((first, [(7, 6, 5, 5), (0, 6, 2, 5), (6, 4, 5, 4)]),
+                             (second, [(6, 4, 5, 4), (0, 6, 2, 5), (7, 6, 5, 5)])):
+            for from_row, from_col, to_row, to_col in moves:
+                board.select_piece(from_row, from_col)
+                self.assertTrue(board.move_piece(to_row, to_col))
+        self.assertEqual(first.zobrist, second.zobrist)
+        self.assertNotEqual(first.zobrist, start)
+
+        # Moving the king gives up both castling rights
+        board = ChessBoard(game_mode=MODE_HUMAN_VS_HUMAN)
+        before = board.zobrist
+        board.board[7][4].has_moved = True
+        self.assertNotEqual(board.zobrist, before)
+
+    def test_move_cache(self):
+        """Test that moves are reused for an unchanged position and regenerated after a change."""
+        board = ChessBoard(game_mode=MODE_HUMAN_VS_HUMAN)
+        knight = board.board[7][6]
+        moves = knight.get_legal_moves(board)
+
+        with mock.patch.object(ChessPiece, "_generate_moves") as generate:
+            self.assertEqual(knight.get_legal_moves(board), moves)
+            generate.assert_not_called()
+
+        # A move elsewhere on the board keeps the knight's cached moves
+        board.select_piece(6, 0)
+        self.assertTrue(board.move_piece(4, 0))
+        with mock.patch.object(ChessPiece, "_generate_moves") as generate:
+            self.assertEqual(knight.get_legal_moves(board), moves)
+            generate.assert_not_called()
+
+        # Blocking f3 changes a square the knight can reach, so the moves are regenerated
+        board.board[5][5] = ChessPiece(PAWN, 'white', (5, 5))
+        self.assertEqual(sorted(knight.get_legal_moves(board)), [(5, 7)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,15 @@
 import unittest
+from unittest import mock
+import io
 import os
 import platform
-from chess_ai import ChessAI
+import struct
+import tarfile
+import tempfile
+import time
+import zipfile
+import chess
+from chess_ai import ChessAI, ZobristBoard
 
 class TestChessAI(unittest.TestCase):
     """Test cases for the ChessAI class."""
@@ -9,7 +17,7 @@ class TestChessAI(unittest.TestCase):
     def setUp(self):
         """Set up a new ChessAI instance for each test."""
         # Use a lower difficulty and time limit for faster tests
-        self.ai = ChessAI(difficulty=5, time_limit=0.05)
+        self.ai = ChessAI(difficulty=5, time_limit=0.05, tt_file=None)
     
     def tearDown(self):
         """Clean up after each test."""
@@ -33,6 +41,78 @@ class TestChessAI(unittest.TestCase):
             self.assertIsInstance(result, str)
             self.assertTrue(os.path.exists(result))
     
+    def test_find_stockfish_uses_cached_path(self):
+        """Test that a cached Stockfish location is reused while it stays executable."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            binary = os.path.join(tmp_dir, "stockfish")
+            with open(binary, 'w') as f:
+                f.write("")
+            os.chmod(binary, 0o755)
+            
+            cache_file = os.path.join(tmp_dir, "cache", "stockfish_path")
+            with mock.patch.object(ChessAI, "STOCKFISH_PATH_CACHE", cache_file):
+                self.ai._write_cached_stockfish_path(binary)
+                self.assertEqual(self.ai._find_stockfish(), binary)
+                
+                # A stale cache entry is ignored
+                os.remove(binary)
+                self.assertIsNone(self.ai._read_cached_stockfish_path())
+    
+    def test_extract_tar_member(self):
+        """Test extracting the Stockfish binary from a streamed tarball."""
+        # Build a small archive with the binary next to other files
+        archive = io.BytesIO()
+        with tarfile.open(fileobj=archive, mode='w:gz') as tar:
+            for name, data in [("stockfish/README.md", b"readme"),
+                               ("stockfish/stockfish-ubuntu-x86-64-avx2", b"binary")]:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                tar.addfile(info, io.BytesIO(data))
+        archive.seek(0)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dest = os.path.join(tmp_dir, "stockfish")
+            found = self.ai._extract_tar_member(archive, "stockfish-ubuntu-x86-64-avx2", dest)
+            
+            self.assertTrue(found)
+            with open(dest, 'rb') as f:
+                self.assertEqual(f.read(), b"binary")
+    
+    def test_extract_zip_member(self):
+        """Test extracting only the Stockfish binary from a zip archive."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            zip_path = os.path.join(tmp_dir, "stockfish.zip")
+            with zipfile.ZipFile(zip_path, 'w') as zip_ref:
+                zip_ref.writestr("stockfish/README.md", b"readme")
+                zip_ref.writestr("stockfish/stockfish-windows-x86-64-avx2.exe", b"binary")
+            
+            dest = os.path.join(tmp_dir, "stockfish.exe")
+            found = self.ai._extract_zip_member(zip_path, "stockfish-windows-x86-64-avx2.exe", dest)
+            
+            self.assertTrue(found)
+            with open(dest, 'rb') as f:
+                self.assertEqual(f.read(), b"binary")
+            self.assertFalse(self.ai._extract_zip_member(zip_path, "missing-binary", dest + ".2"))
+    
+    def test_download_cleans_up_partial_binary(self):
+        """Test that a download failing after extraction started leaves no partial binary behind."""
+        def extract(fileobj, binary_name, dest):
+            with open(dest, 'wb') as f:
+                f.write(b"partial")
+            raise OSError("connection reset")
+        
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            os.chdir(tmp_dir)
+            try:
+                with mock.patch.object(platform, "system", return_value="Linux"), \
+                        mock.patch("urllib.request.urlopen", return_value=io.BytesIO()), \
+                        mock.patch.object(ChessAI, "_extract_tar_member", side_effect=extract):
+                    self.assertIsNone(self.ai._download_stockfish())
+                self.assertEqual(os.listdir(tmp_dir), [])
+            finally:
+                os.chdir(cwd)
+    
     def test_get_best_move_initial_position(self):
         """Test getting a move from the initial position."""
         # The board is in the initial position, so there should be a valid move
@@ -80,6 +160,60 @@ class TestChessAI(unittest.TestCase):
         # Now it should be white's turn again
         self.assertEqual(self.ai.board.turn, True)  # True is white in python-chess
     
+    def test_update_board_incremental(self):
+        """Test that only new moves are applied and diverging history is unwound."""
+        moves = [((6, 4), (4, 4)), ((1, 4), (3, 4))]  # e2-e4, e7-e5
+        self.ai.update_board(moves)
+        board = self.ai.board
+        
+        # Appending a move reuses the same board
+        moves.append(((7, 6), (5, 5)))  # Ng1-f3
+        self.ai.update_board(moves)
+        self.assertIs(self.ai.board, board)
+        self.assertEqual(len(self.ai.board.move_stack), 3)
+        
+        # A different continuation replaces the last move
+        self.ai.update_board(moves[:2] + [((6, 3), (4, 3))])  # d2-d4
+        self.assertEqual(len(self.ai.board.move_stack), 3)
+        self.assertEqual(self.ai.board.peek(), chess.Move.from_uci("d2d4"))
+        
+        # A shorter history unwinds the board
+        self.ai.update_board(moves[:1])
+        self.assertEqual(len(self.ai.board.move_stack), 1)
+        self.assertEqual(self.ai.board.turn, False)
+    
+    def test_update_board_castling(self):
+        """Test that a two-square king move is applied as castling."""
+        moves = [
+            ((6, 4), (4, 4)),  # e2-e4
+            ((1, 4), (3, 4)),  # e7-e5
+            ((7, 6), (5, 5)),  # Ng1-f3
+            ((0, 1), (2, 2)),  # Nb8-c6
+            ((7, 5), (4, 2)),  # Bf1-c4
+            ((0, 5), (3, 2)),  # Bf8-c5
+            ((7, 4), (7, 6))   # O-O
+        ]
+        self.ai.update_board(moves)
+        
+        self.assertEqual(len(self.ai.board.move_stack), 7)
+        self.assertEqual(self.ai.board.piece_at(chess.F1), chess.Piece(chess.ROOK, chess.WHITE))
+        self.assertIsNone(self.ai.board.piece_at(chess.H1))
+    
+    def test_update_board_en_passant(self):
+        """Test that a diagonal pawn move to an empty square is applied as en passant."""
+        moves = [
+            ((6, 4), (4, 4)),  # e2-e4
+            ((1, 0), (2, 0)),  # a7-a6
+            ((4, 4), (3, 4)),  # e4-e5
+            ((1, 3), (3, 3)),  # d7-d5
+            ((3, 4), (2, 3))   # exd6 e.p.
+        ]
+        self.ai.update_board(moves)
+        
+        self.assertEqual(len(self.ai.board.move_stack), 5)
+        self.assertIsNone(self.ai.board.piece_at(chess.D5))
+        self.assertEqual(self.ai.board.piece_at(chess.D6), chess.Piece(chess.PAWN, chess.WHITE))
+    
     def test_game_over_detection(self):
         """Test detection of game over conditions."""
         # Initial position is not game over
@@ -100,6 +234,202 @@ class TestChessAI(unittest.TestCase):
         # Now the game should be over
         self.assertTrue(self.ai.is_game_over())
         self.assertEqual(self.ai.get_game_result(), "Checkmate")
+    
+    def test_random_move_game_over(self):
+        """Test that the random fallback returns no move once the game is over."""
+        self.ai.board = chess.Board("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1")  # Stalemate
+        self.assertIsNone(self.ai._get_random_move())
+        
+        self.ai.board = chess.Board("7k/8/6K1/8/8/8/8/8 b - - 0 1")  # Insufficient material
+        self.assertIsNone(self.ai._get_random_move())
+        
+        self.ai.board = chess.Board()
+        self.assertIsNotNone(self.ai._get_random_move())
+
+    def test_engine_options(self):
+        """Test that engine options are sized to the host and filtered by support."""
+        class FakeEngine:
+            options = {"Skill Level": None, "Threads": None}
+        
+        engine = self.ai.engine
+        self.ai.engine = FakeEngine()
+        try:
+            options = self.ai._engine_options(threads=64, hash_mb=256)
+        finally:
+            self.ai.engine = engine
+        
+        # Threads are capped and unsupported options (Hash) are dropped
+        self.assertEqual(options, {"Skill Level": 5, "Threads": ChessAI.MAX_ENGINE_THREADS})
+    
+    def test_search_limit(self):
+        """Test that low difficulties search to a fixed depth instead of a time limit."""
+        self.ai.difficulty = 1
+        self.assertEqual(self.ai._search_limit(), chess.engine.Limit(depth=1))
+        self.ai.difficulty = 10
+        self.assertEqual(self.ai._search_limit(), chess.engine.Limit(depth=5))
+        self.ai.difficulty = 11
+        self.assertEqual(self.ai._search_limit(), chess.engine.Limit(time=0.05))
+    
+    def test_choose_candidate(self):
+        """Test the score-weighted choice among multipv candidates."""
+        e4 = chess.Move.from_uci("e2e4")
+        a3 = chess.Move.from_uci("a2a3")
+        infos = [
+            {"pv": [e4], "score": chess.engine.PovScore(chess.engine.Cp(50), chess.WHITE)},
+            {"pv": [a3], "score": chess.engine.PovScore(chess.engine.Cp(-2000), chess.WHITE)},
+        ]
+        
+        # A move 20 pawns worse is practically never picked
+        for _ in range(20):
+            self.assertEqual(self.ai._choose_candidate(self.ai._candidate_moves(infos)), e4)
+        self.assertEqual(self.ai._candidate_moves([{}]), [])
+        self.assertIsNone(self.ai._choose_candidate([]))
+    
+    def test_background_search(self):
+        """Test that a background search is collected by get_best_move."""
+        self.ai.update_board([((6, 4), (4, 4))])  # e2-e4
+        self.ai.start_thinking()
+        
+        move = self.ai.get_best_move()
+        
+        self.assertIsNotNone(move)
+        self.assertEqual(len(self.ai.board.move_stack), 2)
+        self.assertIsNone(self.ai._search)
+    
+    def test_new_game(self):
+        """Test starting a new game without restarting the engine."""
+        engine = self.ai.engine
+        self.ai.update_board([((6, 4), (4, 4))])
+        
+        self.ai.new_game(difficulty=15)
+        
+        self.assertEqual(self.ai.board.fen(), chess.Board().fen())
+        self.assertEqual(self.ai.difficulty, 15)
+        self.assertIs(self.ai.engine, engine)
+    
+    def test_new_game_during_background_search(self):
+        """Test that a search from the previous game finishes first and is cached at its own difficulty."""
+        e4 = chess.Move.from_uci("e2e4")
+        calls = []
+        
+        def play(board, limit, **kwargs):
+            time.sleep(0.1)
+            calls.append("play")
+            return chess.engine.PlayResult(e4, None)
+        
+        ai = ChessAI(difficulty=5, time_limit=0.05, tt_file=None, multipv=1)
+        try:
+            ai.engine = mock.Mock()
+            ai.engine.play.side_effect = play
+            ai.engine.configure.side_effect = lambda options: calls.append("configure")
+            
+            ai.start_thinking()
+            ai.new_game(difficulty=15)
+            
+            self.assertEqual(calls, ["play", "configure"])
+            self.assertEqual(ai._probe_transposition(ai.board, 5), e4)
+            self.assertIsNone(ai._probe_transposition(ai.board, 15))
+        finally:
+            ai.close()
+    
+    def test_context_manager(self):
+        """Test that leaving the with block closes the AI, and closing twice is harmless."""
+        with ChessAI(difficulty=5, time_limit=0.05, tt_file=None) as ai:
+            self.assertFalse(ai._closed)
+        
+        self.assertTrue(ai._closed)
+        self.assertIsNone(ai.engine)
+        ai.close()
+    
+    def test_zobrist_board_incremental_key(self):
+        """Test that the incremental Zobrist key matches a full rehash."""
+        # Castling both ways, en passant and promotion with capture
+        board = ZobristBoard("r3k2r/1P6/8/8/3pP3/8/8/R3K2R b KQkq e3 0 1")
+        self.assertEqual(board.zobrist_key(), chess.polyglot.zobrist_hash(board))
+        for uci in ["d4e3", "e1c1", "e8g8", "b7a8q", "e3e2", "a8b8", "e2d1n"]:
+            board.push_uci(uci)
+            self.assertEqual(board.zobrist_key(), chess.polyglot.zobrist_hash(board))
+        
+        copy = board.copy(stack=3)
+        while board.move_stack:
+            board.pop()
+            self.assertEqual(board.zobrist_key(), chess.polyglot.zobrist_hash(board))
+        
+        for _ in range(3):
+            copy.pop()
+            self.assertEqual(copy.zobrist_key(), chess.polyglot.zobrist_hash(copy))
+        
+        # Positions set up directly are rehashed
+        board.set_fen("8/8/8/8/8/8/8/K6k w - - 0 1")
+        self.assertEqual(board.zobrist_key(), chess.polyglot.zobrist_hash(board))
+    
+    def test_transposition_table_hit(self):
+        """Test that a cached position is answered from the transposition table."""
+        ai = ChessAI(difficulty=5, time_limit=0.05, tt_file=None)
+        try:
+            # Cache e2-e4 as the best move for the initial position
+            ai._store_transposition(ai.board, [(chess.Move.from_uci("e2e4"), 0)])
+            
+            move = ai.get_best_move()
+            self.assertEqual(move, ((6, 4), (4, 4)))
+            self.assertEqual(ai.board.peek(), chess.Move.from_uci("e2e4"))
+        finally:
+            ai.close()
+    
+    def test_transposition_table_redraws_candidates(self):
+        """Test that repeated hits on a cached position draw again among its candidates."""
+        e4 = chess.Move.from_uci("e2e4")
+        d4 = chess.Move.from_uci("d2d4")
+        score = chess.engine.PovScore(chess.engine.Cp(20), chess.WHITE)
+        ai = ChessAI(difficulty=5, time_limit=0.05, tt_file=None)
+        try:
+            ai.engine = mock.Mock()
+            ai.engine.analyse.return_value = [{"pv": [e4], "score": score}, {"pv": [d4], "score": score}]
+            
+            # One search, then answers from the table that still vary
+            moves = {ai._search_position(ai.board, ai.difficulty) for _ in range(50)}
+            self.assertEqual(moves, {e4, d4})
+            ai.engine.analyse.assert_called_once()
+        finally:
+            ai.close()
+    
+    def test_transposition_table_gated_by_difficulty(self):
+        """Test that entries stored at one difficulty are not used at another."""
+        ai = ChessAI(difficulty=5, time_limit=0.05, tt_file=None)
+        try:
+            ai._store_transposition(ai.board, [(chess.Move.from_uci("e2e4"), 0)])
+            ai.difficulty = 15
+            self.assertIsNone(ai._probe_transposition(ai.board))
+        finally:
+            ai.close()
+    
+    def test_transposition_table_persistence(self):
+        """Test that the table is saved on close and loaded by the next AI, outside the working directory."""
+        self.assertNotEqual(os.path.dirname(ChessAI.TT_FILE), "")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tt_file = os.path.join(tmp_dir, "cache", "ai_transpositions.pkl")
+            with ChessAI(difficulty=5, time_limit=0.05, tt_file=tt_file) as ai:
+                ai._store_transposition(ai.board, [(chess.Move.from_uci("e2e4"), 0)])
+            
+            with ChessAI(difficulty=5, time_limit=0.05, tt_file=tt_file) as ai:
+                self.assertEqual(ai._probe_transposition(ai.board), chess.Move.from_uci("e2e4"))
+    
+    def test_opening_book(self):
+        """Test that book positions are answered from the opening book."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Single polyglot entry: e2-e4 from the initial position
+            book_file = os.path.join(tmp_dir, "book.bin")
+            raw_move = 4 | (3 << 3) | (4 << 6) | (1 << 9)
+            with open(book_file, 'wb') as f:
+                f.write(struct.pack(">QHHI", chess.polyglot.zobrist_hash(chess.Board()), raw_move, 1, 0))
+            
+            ai = ChessAI(difficulty=5, time_limit=0.05, tt_file=None, book_file=book_file)
+            try:
+                self.assertEqual(ai.get_best_move(), ((6, 4), (4, 4)))
+                # Out of book after the first move
+                self.assertIsNone(ai._probe_book(ai.board))
+            finally:
+                ai.close()
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -1,9 +1,22 @@
 import unittest
+from unittest import mock
+import os
+import tempfile
+import pygame
+import constants
 from chess_board import ChessPiece, ChessBoard, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, create_piece_images
 
 class TestChessPiece(unittest.TestCase):
     """Test cases for the ChessPiece class."""
     
+    def setUp(self):
+        """Keep rendered piece images out of the real per-user cache."""
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        cache_patch = mock.patch.object(constants, "PIECE_CACHE_DIR", cache_dir.name)
+        cache_patch.start()
+        self.addCleanup(cache_patch.stop)
+    
     def test_init(self):
         """Test initialization of a chess piece."""
         piece = ChessPiece(PAWN, 'white', (6, 0))
@@ -19,10 +32,34 @@ class TestChessPiece(unittest.TestCase):
         
     def test_create_piece_images(self):
         """Test that piece images are created correctly."""
+        pygame.init()
+        if not pygame.display.get_surface():
+            pygame.display.set_mode((1, 1))
+        
         piece_images = create_piece_images()
         self.assertIn('white_pawn', piece_images)
         self.assertIn('black_king', piece_images)
         self.assertEqual(len(piece_images), 12)  # 6 piece types * 2 colors
+    
+    def test_piece_image_cache(self):
+        """Test that rendered piece images are cached on disk and reloaded identically."""
+        pygame.init()
+        if not pygame.display.get_surface():
+            pygame.display.set_mode((1, 1))
+        
+        with tempfile.TemporaryDirectory() as cache_dir:
+            with mock.patch.object(constants, "PIECE_CACHE_DIR", cache_dir):
+                rendered = create_piece_images()
+                self.assertEqual(len(os.listdir(cache_dir)), 1)
+                
+                with mock.patch.object(constants, "_render_piece_images") as render:
+                    cached = create_piece_images()
+                    render.assert_not_called()
+        
+        self.assertEqual(cached.keys(), rendered.keys())
+        for key, image in rendered.items():
+            self.assertEqual(pygame.image.tostring(cached[key], 'RGBA'),
+                             pygame.image.tostring(image, 'RGBA'))
 
 class TestChessBoard(unittest.TestCase):
     """Test cases for the ChessBoard class."""
@@ -106,6 +143,23 @@ class TestChessBoard(unittest.TestCase):
         
         # Verify it's now black's turn
         self.assertEqual(self.board.turn, 'black')
+    
+    def test_dirty_rects(self):
+        """Test that only frames after a change report dirty screen areas."""
+        self.board._collect_dirty_rects()
+        self.assertEqual(len(self.board.take_dirty_rects()), 1)
+        
+        # Nothing changed since the last frame
+        self.board._collect_dirty_rects()
+        self.assertEqual(self.board.take_dirty_rects(), [])
+        
+        self.assertFalse(self.board.needs_redraw())
+        
+        # Selecting a piece changes the highlights
+        self.board.select_piece(6, 0)
+        self.assertTrue(self.board.needs_redraw())
+        self.board._collect_dirty_rects()
+        self.assertEqual(len(self.board.take_dirty_rects()), 1)
 
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
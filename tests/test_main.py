@@ -0,0 +1,51 @@
+import unittest
+import threading
+import time
+import pygame
+import main
+
+class TestMainLoop(unittest.TestCase):
+    """Test cases for helpers of the main game loop."""
+
+    def setUp(self):
+        """Open a display so the event queue is available, and start with it empty."""
+        pygame.init()
+        if not pygame.display.get_surface():
+            pygame.display.set_mode((1, 1))
+        pygame.event.set_allowed(None)
+        pygame.event.clear()
+
+    def post_click(self):
+        """Queue a left-button press and release on the same spot."""
+        for event_type in (pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP):
+            pygame.event.post(pygame.event.Event(event_type, button=1, pos=(10, 10)))
+
+    def test_wait_keeps_queued_events_in_order(self):
+        """Test that idling with events already queued leaves them untouched."""
+        self.post_click()
+
+        events = main._wait_for_event(1000) + pygame.event.get()
+
+        self.assertEqual([event.type for event in events],
+                         [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP])
+
+    def test_wait_returns_event_that_woke_it(self):
+        """Test that the event ending the wait is handed back ahead of later ones."""
+        timer = threading.Timer(0.05, self.post_click)
+        timer.start()
+        try:
+            events = main._wait_for_event(1000)
+            time.sleep(0.05)
+            events += pygame.event.get()
+        finally:
+            timer.join()
+
+        self.assertEqual([event.type for event in events],
+                         [pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP])
+
+    def test_wait_times_out(self):
+        """Test that an idle wait with no events returns nothing."""
+        self.assertEqual(main._wait_for_event(10), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,16 +7,24 @@ from constants import SQUARE_SIZE, ANIMATION_SPEED
 class AnimatedPiece:
     """Represents a chess piece that is being animated."""
     
+    __slots__ = (
+        'piece_type', 'color', 'end_row', 'end_col', 'start_x', 'start_y', 'end_x', 'end_y',
+        'current_x', 'current_y', 'image', 'completed', 'dx', 'dy', 'total_frames', 'frame_idx'
+    )
+    
     def __init__(self, piece_type: str, color: str, 
                  start_pos: Tuple[int, int], end_pos: Tuple[int, int],
                  image: pygame.Surface):
         self.piece_type = piece_type
         self.color = color
         
-        # Convert board positions to pixel positions
+        # Board square the piece ends on
         start_row, start_col = start_pos
         end_row, end_col = end_pos
+        self.end_row = end_row
+        self.end_col = end_col
         
+        # Convert board positions to pixel positions
         self.start_x = start_col * SQUARE_SIZE
         self.start_y = start_row * SQUARE_SIZE
         self.end_x = end_col * SQUARE_SIZE
@@ -28,43 +36,36 @@ class AnimatedPiece:
         self.image = image
         self.completed = False
         
-        # Calculate the distance and direction
+        # Total offset to cover; positions are whole squares and the speed is
+        # constant, so the number of frames is known up front
         self.dx = self.end_x - self.start_x
         self.dy = self.end_y - self.start_y
-        self.distance = math.sqrt(self.dx**2 + self.dy**2)
-        
-        # Normalize direction vector
-        if self.distance > 0:
-            self.dx /= self.distance
-            self.dy /= self.distance
+        self.total_frames = max(1, math.ceil(max(abs(self.dx), abs(self.dy)) / ANIMATION_SPEED))
+        self.frame_idx = 0
     
     def update(self) -> None:
         """Update the position of the animated piece."""
         if self.completed:
             return
-            
-        # Calculate how much to move this frame
-        move_amount = ANIMATION_SPEED
-        
-        # Calculate the distance left to move
-        remaining_distance = math.sqrt(
-            (self.end_x - self.current_x)**2 + 
-            (self.end_y - self.current_y)**2
-        )
         
-        # If we're close enough to the end, snap to it
-        if remaining_distance <= move_amount:
+        # Interpolate linearly between start and end by the fraction of frames done
+        self.frame_idx += 1
+        if self.frame_idx >= self.total_frames:
             self.current_x = self.end_x
             self.current_y = self.end_y
             self.completed = True
         else:
-            # Move along the direction vector
-            self.current_x += self.dx * move_amount
-            self.current_y += self.dy * move_amount
+            t = self.frame_idx / self.total_frames
+            self.current_x = self.start_x + self.dx * t
+            self.current_y = self.start_y + self.dy * t
     
     def draw(self, screen: pygame.Surface) -> None:
         """Draw the animated piece at its current position."""
-        screen.blit(self.image, (int(self.current_x), int(self.current_y)))
+        x, y = int(self.current_x), int(self.current_y)
+        # Skip the blit entirely when the piece lies outside the drawable area
+        if not screen.get_clip().colliderect((x, y, SQUARE_SIZE, SQUARE_SIZE)):
+            return
+        screen.blit(self.image, (x, y), special_flags=pygame.BLEND_PREMULTIPLIED)
     
     def is_completed(self) -> bool:
         """Check if the animation is completed."""
@@ -1,11 +1,31 @@
 import pygame
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional
 
 from constants import UI_BUTTON, UI_BUTTON_HOVER, UI_BUTTON_ACTIVE, UI_BUTTON_TEXT
 
+# Shared by all buttons; created on first use since SysFont needs pygame.font initialized
+_BUTTON_FONT: Optional[pygame.font.Font] = None
+
+
+def _get_button_font() -> pygame.font.Font:
+    """Return the shared button font, loading it the first time."""
+    global _BUTTON_FONT
+    if _BUTTON_FONT is None:
+        if not pygame.font.get_init():
+            pygame.font.init()
+        _BUTTON_FONT = pygame.font.SysFont('Arial', 16)
+    return _BUTTON_FONT
+
+
 class Button:
     """A modern button class for the UI."""
     
+    __slots__ = (
+        'rect', '_text', 'color', 'hover_color', 'active_color', 'text_color',
+        'hovered', 'active', 'icon', 'font', '_text_surf', '_shadow_surf',
+        '_gradient_colors', '_border_colors'
+    )
+    
     def __init__(self, x: int, y: int, width: int, height: int, text: str, 
                  color: Tuple[int, int, int] = UI_BUTTON, 
                  hover_color: Tuple[int, int, int] = UI_BUTTON_HOVER,
@@ -13,7 +33,6 @@ class Button:
                  text_color: Tuple[int, int, int] = UI_BUTTON_TEXT,
                  icon: Optional[pygame.Surface] = None):
         self.rect = pygame.Rect(x, y, width, height)
-        self.text = text
         self.color = color
         self.hover_color = hover_color
         self.active_color = active_color
@@ -21,7 +40,26 @@ class Button:
         self.hovered = False
         self.active = False
         self.icon = icon
-        self.font = pygame.font.SysFont('Arial', 16)
+        # Lighter top half and darker border for each state color
+        states = (color, hover_color, active_color)
+        self._gradient_colors = {c: tuple(min(x + 20, 255) for x in c) for c in states}
+        self._border_colors = {c: tuple(max(x - 30, 0) for x in c) for c in states}
+        self.font = _get_button_font()
+        self._text = None
+        self.text = text
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    @text.setter
+    def text(self, text: str) -> None:
+        """Set the label and render its text and shadow surfaces."""
+        if text == self._text:
+            return
+        self._text = text
+        self._text_surf = self.font.render(text, True, self.text_color)
+        self._shadow_surf = self.font.render(text, True, (0, 0, 0, 128))
         
     def draw(self, screen: pygame.Surface) -> None:
         """Draw the button on the screen with a modern look."""
@@ -38,11 +76,11 @@ class Button:
         
         # Add a subtle gradient effect
         gradient_rect = pygame.Rect(self.rect.x, self.rect.y, self.rect.width, self.rect.height // 2)
-        gradient_color = tuple(min(c + 20, 255) for c in color)
+        gradient_color = self._gradient_colors[color]
         pygame.draw.rect(screen, gradient_color, gradient_rect, border_radius=8)
         
         # Add a subtle border
-        border_color = tuple(max(c - 30, 0) for c in color)
+        border_color = self._border_colors[color]
         pygame.draw.rect(screen, border_color, self.rect, 2, border_radius=8)
         
         # Draw icon if provided
@@ -53,14 +91,14 @@ class Button:
             text_x_offset = self.icon.get_width() + 5
         
         # Draw text
-        text_surface = self.font.render(self.text, True, self.text_color)
+        text_surface = self._text_surf
         if self.icon:
             text_rect = text_surface.get_rect(midleft=(self.rect.x + 15 + text_x_offset, self.rect.centery))
         else:
             text_rect = text_surface.get_rect(center=self.rect.center)
         
         # Add a subtle shadow effect for text
-        shadow_surface = self.font.render(self.text, True, (0, 0, 0, 128))
+        shadow_surface = self._shadow_surf
         shadow_rect = shadow_surface.get_rect(topleft=(text_rect.x + 1, text_rect.y + 1))
         screen.blit(shadow_surface, shadow_rect)
         screen.blit(text_surface, text_rect)
@@ -84,4 +122,44 @@ class Button:
         
     def set_active(self, active: bool) -> None:
         """Set the active state of the button."""
-        self.active = active 
\ No newline at end of file
+        self.active = active 
+
+
+class ButtonPanel:
+    """
+    A vertical strip of equally spaced buttons.
+    
+    Only one button can be under the mouse, so hovering is tested with a single
+    row lookup instead of checking every button.
+    """
+    
+    __slots__ = ('buttons', '_by_row', '_top', '_stride', '_hovered')
+    
+    def __init__(self, buttons: List[Button]):
+        self.buttons = buttons
+        self._by_row = sorted(buttons, key=lambda button: button.rect.y)
+        self._top = self._by_row[0].rect.y
+        if len(self._by_row) > 1:
+            self._stride = self._by_row[1].rect.y - self._top
+        else:
+            self._stride = self._by_row[0].rect.height
+        self._hovered: Optional[Button] = None
+    
+    def button_at(self, pos: Tuple[int, int]) -> Optional[Button]:
+        """Return the button under pos, if any."""
+        row = (pos[1] - self._top) // self._stride
+        if 0 <= row < len(self._by_row):
+            button = self._by_row[row]
+            if button.rect.collidepoint(pos):
+                return button
+        return None
+    
+    def update(self, mouse_pos: Tuple[int, int]) -> None:
+        """Move the hover state to the button under the mouse."""
+        button = self.button_at(mouse_pos)
+        if button is not self._hovered:
+            if self._hovered is not None:
+                self._hovered.hovered = False
+            if button is not None:
+                button.hovered = True
+            self._hovered = button
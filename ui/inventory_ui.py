@@ -26,6 +26,8 @@ class InventoryUI:
         self.selected_piece = None
         self.scroll_offset = 0
         self.max_pieces_per_page = 8
+        # Scaled-down piece images for the list, by image key
+        self._thumbnails: Dict[str, pygame.Surface] = {}
         
         # Create UI buttons
         button_width = 180
@@ -283,10 +285,13 @@ class InventoryUI:
             if piece_index == self.selected_piece_index:
                 pygame.draw.rect(screen, UI_BUTTON_ACTIVE, (50, y_pos, WINDOW_WIDTH - 100, piece_height))
             
-            # Draw piece image
-            image = piece_images[piece.get_image_key()]
-            small_image = pygame.transform.scale(image, (50, 50))
-            screen.blit(small_image, (60, y_pos + 10))
+            # Draw piece image (scaled once per piece kind, not every frame)
+            image_key = piece.get_image_key()
+            small_image = self._thumbnails.get(image_key)
+            if small_image is None:
+                small_image = pygame.transform.smoothscale(piece_images[image_key], (50, 50))
+                self._thumbnails[image_key] = small_image
+            screen.blit(small_image, (60, y_pos + 10), special_flags=pygame.BLEND_PREMULTIPLIED)
             
             # Draw piece info
             name_text = font.render(f"{piece.color.capitalize()} {piece.piece_type.capitalize()}", True, UI_TEXT)
@@ -333,7 +338,11 @@ class InventoryUI:
         
         # Draw piece image
         image = piece_images[piece.get_image_key()]
-        screen.blit(image, (detail_x + detail_width // 2 - SQUARE_SIZE // 2, detail_y + 40))
+        screen.blit(
+            image,
+            (detail_x + detail_width // 2 - SQUARE_SIZE // 2, detail_y + 40),
+            special_flags=pygame.BLEND_PREMULTIPLIED
+        )
         
         # Draw piece info
         info_font = pygame.font.SysFont('Arial', 16)